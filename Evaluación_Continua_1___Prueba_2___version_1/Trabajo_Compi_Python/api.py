@@ -1,18 +1,36 @@
 from __future__ import annotations
+from concurrent.futures import CancelledError, ProcessPoolExecutor
 from typing import List, Dict, Any, Optional
+import json
+import os
+import tempfile
+import time
 from pydantic import BaseModel
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 
 # dual imports
 if __package__ is None or __package__ == "":
     from grammar import Grammar
-    from lr1 import LR1Builder
-    from lr_parser import LRParser, ParseNode, _render_ascii
+    from lr1 import LR1Builder, LR1Item, MODES
+    from lr_parser import LRParser, CompactTrace, render_tree_ascii, tree_to_json, error_to_json
+    from cache import GrammarCache, build_grammar, grammar_key
+    from tablefile import CompiledTables, load_tables
+    from batch import BatchRunner
+    from metrics import Metrics
+    from jobs import BuildJobs, LimitedExecutor
+    from registry import GrammarRegistry
 else:
     from .grammar import Grammar
-    from .lr1 import LR1Builder
-    from .lr_parser import LRParser, ParseNode, _render_ascii
+    from .lr1 import LR1Builder, LR1Item, MODES
+    from .lr_parser import LRParser, CompactTrace, render_tree_ascii, tree_to_json, error_to_json
+    from .cache import GrammarCache, build_grammar, grammar_key
+    from .tablefile import CompiledTables, load_tables
+    from .batch import BatchRunner
+    from .metrics import Metrics
+    from .jobs import BuildJobs, LimitedExecutor
+    from .registry import GrammarRegistry
 
 app = FastAPI(title="LR(1) Parser API")
 
@@ -26,93 +44,185 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # let browser clients read the build phase timings
+    expose_headers=["Server-Timing"],
 )
 
+metrics = Metrics()
+# Endpoints whose latency is recorded in /metrics
+TIMED_ENDPOINTS = ("/build", "/parse")
+
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    t0 = time.perf_counter()
+    response = await call_next(request)
+    if request.url.path in TIMED_ENDPOINTS:
+        metrics.observe_request(request.url.path, time.perf_counter() - t0)
+    return response
+
 
 class GrammarRequest(BaseModel):
     grammar: str  # raw grammar text, lines like: S -> C C\nC -> c C\nC -> d
+    mode: str = "lr1"  # "lr1" (canonical) or "lalr"
+    wait: bool = True  # False: start a build job and return its id right away
 
 
-class ParseRequest(BaseModel):
-    grammar: str
+class ParseInput(BaseModel):
     input: str  # tokens separated by spaces
+    mode: str = "lr1"
+    trace: str = "compact"  # "compact" (deltas), "verbose" (full stacks per step) or "none"
+    trace_limit: Optional[int] = None  # keep at most this many steps
+    trace_ring: bool = False  # with trace_limit: keep the last steps instead of the first
+
+
+class ParseRequest(ParseInput):
+    grammar: str
+
+
+class BatchParseRequest(BaseModel):
+    grammar: str
+    inputs: List[str]  # each one: tokens separated by spaces
+    mode: str = "lr1"
+    trace: bool = False  # include the step trace of every input
+    tree: bool = False  # include tree / tree_ascii of every input
+
+
+def check_mode(mode: str) -> None:
+    if mode not in MODES:
+        raise HTTPException(status_code=400, detail=f"Modo desconocido: {mode}. Use uno de: {', '.join(MODES)}")
+
+
+# Grammar builds are CPU bound: they run in a process pool, at most
+# LR1_BUILD_WORKERS at a time, so a big grammar does not hold the GIL for
+# every other request. Builds waiting for a slot queue up and can be
+# cancelled (DELETE /build/{id}). LR1_BUILD_WORKERS=0 builds inline.
+_build_workers = int(os.environ.get("LR1_BUILD_WORKERS", "2"))
+build_pool = (LimitedExecutor(ProcessPoolExecutor(max_workers=_build_workers), _build_workers)
+              if _build_workers > 0 else None)
+
+# Built automata are reused across requests: most traffic is the same few
+# grammars with different inputs. Limits can be tuned through env vars.
+grammar_cache = GrammarCache(
+    build_grammar,
+    max_entries=int(os.environ.get("LR1_CACHE_MAX_ENTRIES", "64")),
+    max_bytes=int(os.environ.get("LR1_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+    executor=build_pool,
+    on_build=lambda mode, lr1: metrics.observe_build(mode, lr1.build_stats),
+)
+
+build_jobs = BuildJobs(grammar_cache, max_pending=int(os.environ.get("LR1_BUILD_MAX_PENDING", "64")))
+
+
+def build_lr1_from_text(grammar_text: str, mode: str = "lr1"):
+    # (Grammar, LR1Builder) from the cache, built in the pool on a miss
+    check_mode(mode)
+    try:
+        return grammar_cache.get(grammar_text, mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except CancelledError:
+        raise HTTPException(status_code=409, detail="La construcción de esta gramática fue cancelada.")
+
+
+def load_precompiled(directory: Optional[str]) -> Dict[str, CompiledTables]:
+    # Tables written with LR1Builder.export_tables, indexed by "mode:hash".
+    # They are memory-mapped, so every worker shares the same pages.
+    out: Dict[str, CompiledTables] = {}
+    if not directory or not os.path.isdir(directory):
+        return out
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.lr1t'):
+            continue
+        try:
+            tables = load_tables(os.path.join(directory, name))
+        except (OSError, ValueError) as e:
+            print(f"No se pudo cargar {name}: {e}")
+            continue
+        out[f"{tables.mode}:{tables.key}"] = tables
+    return out
+
 
+precompiled = load_precompiled(os.environ.get("LR1_TABLES_DIR"))
 
-def build_lr1_from_text(grammar_text: str):
-    g = Grammar()
-    if not g.load_from_string(grammar_text):
-        raise HTTPException(status_code=400, detail="No se pudo cargar la gramática.")
-    lr1 = LR1Builder(g)
-    lr1.build_canonical_collection()
-    lr1.build_tables()
-    return g, lr1
-
-
-def serialize_states(lr1: LR1Builder) -> List[Dict[str, Any]]:
-    out = []
-    for st in lr1.states:
-        items = []
-        for it in sorted(st.items, key=lambda x: (x.lhs, x.rhs, x.dot, x.la)):
-            items.append({
-                "lhs": it.lhs,
-                "rhs": list(it.rhs),
-                "dot": it.dot,
-                "lookahead": it.la,
-                "text": str(it),
-            })
-        transitions = []
-        for (sid, sym), to in lr1.transitions.items():
-            if sid == st.id:
-                transitions.append({"symbol": sym, "to": to})
-        out.append({
-            "id": st.id,
-            "items": items,
-            "transitions": sorted(transitions, key=lambda x: x["symbol"]),
-        })
+batch_runner = BatchRunner(
+    workers=int(os.environ.get("LR1_BATCH_WORKERS", "0")) or None,
+    tables_dir=os.environ.get("LR1_BATCH_DIR"),
+)
+
+
+# Grammars uploaded once with POST /grammars and parsed by id afterwards.
+# Kept on disk as table files, so they survive restarts; evicted after
+# LR1_REGISTRY_MAX_AGE seconds unused or beyond LR1_REGISTRY_MAX_BYTES.
+registry = GrammarRegistry(
+    os.environ.get("LR1_REGISTRY_DIR") or os.path.join(tempfile.gettempdir(), "lr1_registry"),
+    max_age=float(os.environ.get("LR1_REGISTRY_MAX_AGE", str(7 * 24 * 3600))),
+    max_bytes=int(os.environ.get("LR1_REGISTRY_MAX_BYTES", str(512 * 1024 * 1024))),
+)
+
+
+def tables_for(grammar_text: str, mode: str):
+    # Precompiled or registered tables if available, otherwise the cached builder
+    key = grammar_key(grammar_text)
+    lr1 = precompiled.get(f"{mode}:{key}") or registry.get(key, mode)
+    if lr1 is None:
+        _, lr1 = build_lr1_from_text(grammar_text, mode)
+    return lr1
+
+
+def _item_key(it: LR1Item):
+    return (it.lhs, it.rhs, it.dot, it.la)
+
+
+def item_to_dict(it: LR1Item, text: bool = True) -> Dict[str, Any]:
+    out: Dict[str, Any] = {
+        "lhs": it.lhs,
+        "rhs": list(it.rhs),
+        "dot": it.dot,
+        "lookahead": it.la,
+    }
+    if text:
+        out["text"] = str(it)
     return out
 
 
-def serialize_closure_table(lr1: LR1Builder) -> List[Dict[str, Any]]:
-    """Return a serializable closure table suitable for frontend display.
+def _page(lr1: LR1Builder, offset: int, limit: Optional[int]):
+    return lr1.states[offset:] if limit is None else lr1.states[offset:offset + limit]
+
 
-    Each entry contains:
+def serialize_state(lr1: LR1Builder, st) -> Dict[str, Any]:
+    # Structured items only; their text lives in the closure table
+    return {
+        "id": st.id,
+        "items": [item_to_dict(it, text=False) for it in sorted(st.items, key=_item_key)],
+        "transitions": [{"symbol": sym, "to": to} for sym, to in lr1.outgoing(st.id)],
+    }
+
+
+def serialize_states(lr1: LR1Builder, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    return [serialize_state(lr1, st) for st in _page(lr1, offset, limit)]
+
+
+def serialize_closure_entry(lr1: LR1Builder, st) -> Dict[str, Any]:
+    """One closure table row:
       - id: state id
       - kernel: list of item dicts (items that form the kernel)
       - closure: full closure as list of item dicts
       - transitions: outgoing transitions from this state as list of {symbol, to}
     """
-    table: List[Dict[str, Any]] = []
-    for st in lr1.states:
-        # full closure: all items in the state
-        closure_items = sorted(st.items, key=lambda x: (x.lhs, x.rhs, x.dot, x.la))
+    return {
+        "id": st.id,
         # kernel: items with dot > 0 or the augmented start production
-        try:
-            aug_start = lr1.aug_start
-        except Exception:
-            aug_start = None
-        kernel_items = [it for it in closure_items if it.dot > 0 or (aug_start is not None and it.lhs == aug_start)]
-
-        def item_to_dict(it: LR1Item) -> Dict[str, Any]:
-            return {
-                "lhs": it.lhs,
-                "rhs": list(it.rhs),
-                "dot": it.dot,
-                "lookahead": it.la,
-                "text": str(it),
-            }
-
-        transitions = []
-        for (sid, sym), to in lr1.transitions.items():
-            if sid == st.id:
-                transitions.append({"symbol": sym, "to": to})
-
-        table.append({
-            "id": st.id,
-            "kernel": [item_to_dict(it) for it in kernel_items],
-            "closure": [item_to_dict(it) for it in closure_items],
-            "transitions": sorted(transitions, key=lambda x: x["symbol"]),
-        })
-    return table
+        "kernel": [item_to_dict(it) for it in sorted(st.kernel_items, key=_item_key)],
+        # full closure: all items in the state (expanded from the kernel)
+        "closure": [item_to_dict(it) for it in sorted(st.items, key=_item_key)],
+        "transitions": [{"symbol": sym, "to": to} for sym, to in lr1.outgoing(st.id)],
+    }
+
+
+def serialize_closure_table(lr1: LR1Builder, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Return a serializable closure table suitable for frontend display."""
+    return [serialize_closure_entry(lr1, st) for st in _page(lr1, offset, limit)]
 
 
 def serialize_tables(lr1: LR1Builder) -> Dict[str, Any]:
@@ -140,50 +250,226 @@ def serialize_tables(lr1: LR1Builder) -> Dict[str, Any]:
     return {"terminals": terms, "nonterminals": nts, "action": action, "goto": goto}
 
 
-def render_tree_ascii(node: Optional[ParseNode]) -> Optional[str]:
-    if node is None:
-        return None
-    return "\n".join(_render_ascii(node))
+# Optional sections of a /build response, all included by default. For big
+# automata, ask for a few (?include=tables,conflicts) and page the states
+# through /grammars/{id}/states.
+BUILD_SECTIONS = {
+    "rules": lambda g, lr1: g.rules,
+    "states": lambda g, lr1: serialize_states(lr1),
+    "closure_table": lambda g, lr1: serialize_closure_table(lr1),
+    "tables": lambda g, lr1: serialize_tables(lr1),
+    "conflicts": lambda g, lr1: lr1.conflicts,
+    "stats": lambda g, lr1: lr1.build_stats.to_json(),
+}
 
 
-def tree_to_json(node: Optional[ParseNode]) -> Optional[Dict[str, Any]]:
-    if node is None:
-        return None
-    return {
-        "label": node.label,
-        "children": [tree_to_json(ch) for ch in node.children] if node.children else []
-    }
+def parse_include(include: Optional[str]) -> List[str]:
+    if include is None:
+        return list(BUILD_SECTIONS)
+    names = [name.strip() for name in include.split(',') if name.strip()]
+    unknown = [name for name in names if name not in BUILD_SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Sección desconocida: {', '.join(unknown)}. Use: {', '.join(BUILD_SECTIONS)}")
+    return names
 
 
-@app.post("/build")
-def build(req: GrammarRequest):
-    g, lr1 = build_lr1_from_text(req.grammar)
-    return {
+def build_payload(grammar_id: str, g: Grammar, lr1: LR1Builder, response: Response, sections: List[str]) -> Dict[str, Any]:
+    # Timings of the build that produced these tables (possibly cached)
+    response.headers["Server-Timing"] = lr1.build_stats.server_timing()
+    out: Dict[str, Any] = {
+        # key for /grammars/{id}/... while the build stays cached
+        "id": grammar_id,
+        "mode": lr1.mode,
         "initial": g.initialState,
         "terminals": sorted(list(g.terminals)),
         "nonterminals": sorted(list(g.nonTerminals)),
-        "rules": g.rules,
-        "states": serialize_states(lr1),
-        "closure_table": serialize_closure_table(lr1),
-        "tables": serialize_tables(lr1),
-        "conflicts": lr1.conflicts,
+        "state_count": len(lr1.states),
+    }
+    for name in sections:
+        out[name] = BUILD_SECTIONS[name](g, lr1)
+    return out
+
+
+@app.post("/build")
+def build(req: GrammarRequest, response: Response, include: Optional[str] = None):
+    sections = parse_include(include)
+    if not req.wait:
+        # Async mode: 202 with the job id; poll GET /build/{id}
+        check_mode(req.mode)
+        try:
+            job = build_jobs.submit(req.grammar, req.mode)
+        except RuntimeError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        response.status_code = 202
+        return job.to_json()
+    g, lr1 = build_lr1_from_text(req.grammar, req.mode)
+    return build_payload(grammar_key(req.grammar), g, lr1, response, sections)
+
+
+@app.get("/build/{job_id}")
+def build_job_status(job_id: str, response: Response, include: Optional[str] = None):
+    sections = parse_include(include)
+    job = build_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Trabajo desconocido: {job_id}")
+    out = job.to_json()
+    if out["status"] == "done":
+        g, lr1 = job.future.result()
+        out["result"] = build_payload(job.key.split(":", 1)[1], g, lr1, response, sections)
+    return out
+
+
+@app.delete("/build/{job_id}")
+def cancel_build_job(job_id: str):
+    # Only queued jobs can be cancelled; a running build is left to finish
+    cancelled = build_jobs.cancel(job_id)
+    if cancelled is None:
+        raise HTTPException(status_code=404, detail=f"Trabajo desconocido: {job_id}")
+    if not cancelled:
+        raise HTTPException(status_code=409, detail="El trabajo ya está en ejecución o terminó.")
+    return build_jobs.get(job_id).to_json()
+
+
+# Largest page of /grammars/{id}/states
+MAX_STATES_PAGE = 500
+
+
+def built_grammar(grammar_id: str, mode: str):
+    # Only grammars still in the cache can be browsed by id
+    check_mode(mode)
+    built = grammar_cache.lookup(grammar_id, mode)
+    if built is None:
+        raise HTTPException(status_code=404, detail=f"Gramática no construida o expulsada de la caché: {grammar_id} ({mode}). Use POST /build.")
+    return built
+
+
+@app.get("/grammars/{grammar_id}/states")
+def grammar_states(grammar_id: str, mode: str = "lr1", offset: int = 0, limit: int = 50):
+    if offset < 0 or not 1 <= limit <= MAX_STATES_PAGE:
+        raise HTTPException(status_code=400, detail=f"Use offset >= 0 y 1 <= limit <= {MAX_STATES_PAGE}.")
+    _, lr1 = built_grammar(grammar_id, mode)
+    return {
+        "id": grammar_id,
+        "mode": mode,
+        "total": len(lr1.states),
+        "offset": offset,
+        "limit": limit,
+        "states": serialize_states(lr1, offset, limit),
+    }
+
+
+@app.get("/grammars/{grammar_id}/states/{sid}")
+def grammar_state(grammar_id: str, sid: int, mode: str = "lr1"):
+    # Kernel, closure (with item text) and transitions of one state
+    _, lr1 = built_grammar(grammar_id, mode)
+    if not 0 <= sid < len(lr1.states):
+        raise HTTPException(status_code=404, detail=f"Estado inexistente: {sid}")
+    return serialize_closure_entry(lr1, lr1.states[sid])
+
+
+TRACE_FORMATS = ("compact", "verbose", "none")
+
+
+class GrammarUpload(BaseModel):
+    grammar: str
+    mode: str = "lr1"
+
+
+@app.post("/grammars")
+def register_grammar(req: GrammarUpload, response: Response):
+    # Compile once; later parses send only the id and the input
+    grammar_id = grammar_key(req.grammar)
+    tables = registry.get(grammar_id, req.mode)
+    created = tables is None
+    if created:
+        _, lr1 = build_lr1_from_text(req.grammar, req.mode)
+        registry.put(grammar_id, lr1)
+        tables = registry.get(grammar_id, req.mode)
+        if tables is None:
+            raise HTTPException(status_code=500, detail="No se pudo guardar la gramática compilada.")
+        response.status_code = 201
+    return {
+        "id": grammar_id,
+        "mode": tables.mode,
+        "created": created,
+        "initial": tables.start_symbol,
+        "terminals": tables.terminals,
+        "nonterminals": tables.nonterminals,
+        "state_count": tables.n_states,
+        "conflicts": tables.conflicts,
     }
 
 
+@app.post("/grammars/{grammar_id}/parse")
+def parse_registered(grammar_id: str, req: ParseInput):
+    check_mode(req.mode)
+    tables = registry.get(grammar_id, req.mode)
+    if tables is None:
+        raise HTTPException(status_code=404, detail=f"Gramática no registrada o expirada: {grammar_id} ({req.mode}). Use POST /grammars.")
+    return parse_with(tables, req)
+
+
+@app.get("/grammars")
+def registry_stats():
+    return registry.stats()
+
+
 @app.post("/parse")
 def parse(req: ParseRequest):
-    g, lr1 = build_lr1_from_text(req.grammar)
-    tokens = req.input.split()
+    return parse_with(tables_for(req.grammar, req.mode), req)
+
+
+def parse_with(lr1, req: ParseInput) -> Dict[str, Any]:
+    if req.trace not in TRACE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato de traza desconocido: {req.trace}. Use uno de: {', '.join(TRACE_FORMATS)}")
     parser = LRParser(lr1)
-    accepted = parser.parse(tokens, collect_trace=True)
-    return {
-        "accepted": accepted,
+    # Silent run: nothing is printed, the trace is collected by an observer
+    collector = CompactTrace(req.trace_limit, req.trace_ring) if req.trace != "none" else None
+    # Tokenized by the grammar's %token rules, or by whitespace if it has none
+    result = parser.run_text(req.input, build_tree=True, observers=[collector] if collector is not None else ())
+    if collector is None:
+        trace = None
+    elif req.trace == "verbose":
         # Structured trace suitable for a frontend table. Each step has stack and action info.
-        "trace": parser.last_trace,
+        trace = collector.verbose()
+    else:
+        trace = collector.to_json()
+    return {
+        "accepted": result.accepted,
+        "error": error_to_json(result),
+        "trace": trace,
         # JSON tree for UI rendering; keep ASCII version as convenience.
-        "tree": tree_to_json(parser.last_tree),
-        "tree_ascii": render_tree_ascii(parser.last_tree),
+        "tree": tree_to_json(result.flat),
+        "tree_ascii": render_tree_ascii(result.flat),
     }
 
 
+@app.post("/parse/batch")
+def parse_batch(req: BatchParseRequest):
+    # Tables are built (or fetched) once; results stream back as NDJSON,
+    # one line per input, in input order.
+    lr1 = tables_for(req.grammar, req.mode)
+    lines = (json.dumps(item, ensure_ascii=False) + "\n"
+             for item in batch_runner.run(lr1, req.inputs, req.trace, req.tree))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+@app.on_event("shutdown")
+def shutdown_batch_pool() -> None:
+    batch_runner.shutdown()
+    if build_pool is not None:
+        build_pool.shutdown(wait=False, cancel_futures=True)
+
+
+@app.get("/cache")
+def cache_stats():
+    return grammar_cache.stats()
+
+
+@app.get("/metrics")
+def metrics_text():
+    # Prometheus text exposition format
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 # For uvicorn: uvicorn Trabajo_Compi_Python.api:app --reload
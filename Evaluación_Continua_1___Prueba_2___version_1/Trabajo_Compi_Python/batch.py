@@ -0,0 +1,127 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+import os
+import tempfile
+import threading
+
+# Dual-imports to support running as script or module
+if __package__ is None or __package__ == "":
+    from lr_parser import LRParser, TraceCollector, render_tree_ascii, tree_to_json, error_to_json
+    from tablefile import load_tables
+    from cache import grammar_key
+else:
+    from .lr_parser import LRParser, TraceCollector, render_tree_ascii, tree_to_json, error_to_json
+    from .tablefile import load_tables
+    from .cache import grammar_key
+
+
+def parse_one(parser: LRParser, index: int, text: str, with_trace: bool, with_tree: bool) -> Dict[str, Any]:
+    try:
+        if with_trace:
+            collector = TraceCollector()
+            result = parser.run_text(text, build_tree=with_tree, observers=[collector])
+        else:
+            result = parser.run_text(text, build_tree=with_tree)
+    except Exception as e:
+        # One bad input must not break the rest of the stream
+        return {"index": index, "accepted": False, "error": {"message": str(e)}}
+    out: Dict[str, Any] = {"index": index, "accepted": result.accepted, "error": error_to_json(result)}
+    if with_trace:
+        out["trace"] = collector.steps
+    if with_tree:
+        out["tree"] = tree_to_json(result.flat)
+        out["tree_ascii"] = render_tree_ascii(result.flat)
+    return out
+
+
+# -------------------- worker side --------------------
+# Each worker process maps the compiled table file once and keeps the parser.
+_worker_parsers: Dict[str, LRParser] = {}
+
+
+def _parser_for(path: str) -> LRParser:
+    parser = _worker_parsers.get(path)
+    if parser is None:
+        parser = LRParser(load_tables(path))
+        _worker_parsers[path] = parser
+    return parser
+
+
+def parse_chunk(path: str, start: int, inputs: List[str], with_trace: bool, with_tree: bool) -> List[Dict[str, Any]]:
+    parser = _parser_for(path)
+    return [parse_one(parser, start + i, text, with_trace, with_tree) for i, text in enumerate(inputs)]
+
+
+# -------------------- server side --------------------
+class BatchRunner:
+    """Parses many inputs against one grammar.
+
+    Small batches run inline. Larger ones are split in chunks and sent to a
+    process pool; workers get the tables as a compiled file (tablefile) that
+    they memory-map, so the grammar is built only once, in the server.
+    Results are yielded in input order.
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 64,
+                 inline_below: int = 128, tables_dir: Optional[str] = None) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.inline_below = inline_below
+        self.tables_dir = tables_dir or os.path.join(tempfile.gettempdir(), 'lr1_batch')
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+    def tables_path(self, lr1) -> str:
+        # Precompiled tables already live in a file
+        path = getattr(lr1, 'path', None)
+        if path:
+            return path
+        os.makedirs(self.tables_dir, exist_ok=True)
+        # Same key as the table meta: grammars differing only in %token lines
+        # must not share a file
+        key = grammar_key('\n'.join(lr1.grammar.lexRules + lr1.grammar.rules))
+        path = os.path.join(self.tables_dir, f"{lr1.mode}-{key}.lr1t")
+        if not os.path.exists(path):
+            # Write under a private name, then rename: readers never see a partial file
+            fd, tmp = tempfile.mkstemp(dir=self.tables_dir, suffix='.tmp')
+            os.close(fd)
+            try:
+                lr1.export_tables(tmp)
+                os.replace(tmp, path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        return path
+
+    def run(self, lr1, inputs: List[str], with_trace: bool = False, with_tree: bool = False) -> Iterator[Dict[str, Any]]:
+        if len(inputs) < self.inline_below or self.workers <= 1:
+            parser = LRParser(lr1)
+            for i, text in enumerate(inputs):
+                yield parse_one(parser, i, text, with_trace, with_tree)
+            return
+
+        path = self.tables_path(lr1)
+        pool = self._executor()
+        n = self.chunk_size
+        starts = list(range(0, len(inputs), n))
+        futures = [pool.submit(parse_chunk, path, i, inputs[i:i + n], with_trace, with_tree) for i in starts]
+        try:
+            for fut in futures:
+                yield from fut.result()
+        finally:
+            # Client went away or a chunk failed: drop what has not started
+            for fut in futures:
+                fut.cancel()
@@ -0,0 +1,62 @@
+"""Transition lookup benchmark: per-state adjacency vs. scanning `transitions`.
+
+Usage (from the directory containing Trabajo_Compi_Python):
+    python -m Trabajo_Compi_Python.benchmarks.bench_adjacency --sizes 200 400
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import List, Tuple
+import argparse
+import sys
+import time
+
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from grammar import Grammar
+    from lr1 import LR1Builder
+    from grammars import statement_grammar
+else:
+    from ..grammar import Grammar
+    from ..lr1 import LR1Builder
+    from .grammars import statement_grammar
+
+
+def scan_outgoing(lr1: LR1Builder, sid: int) -> List[Tuple[str, int]]:
+    # Previous pattern used by build_tables, the printers and the API
+    # serializers: walk every transition to find those of one state.
+    outs = [(sym, to) for (s, sym), to in lr1.transitions.items() if s == sid]
+    return sorted(outs, key=lambda x: x[0])
+
+
+def _time_all_states(lr1: LR1Builder, lookup) -> float:
+    t0 = time.perf_counter()
+    for st in lr1.states:
+        lookup(st.id)
+    return time.perf_counter() - t0
+
+
+def run(sizes: List[int]) -> None:
+    # One full pass over the states, as each consumer does per call
+    print(f"{'states':>7} {'edges':>7} {'scan (s)':>10} {'adjacency (s)':>14} {'build_tables (s)':>17}")
+    for n in sizes:
+        g = Grammar()
+        g.load_from_string(statement_grammar(n))
+        lr1 = LR1Builder(g)
+        lr1.build_canonical_collection()
+        t0 = time.perf_counter()
+        lr1.build_tables()
+        tables = time.perf_counter() - t0
+        old = _time_all_states(lr1, lambda sid: scan_outgoing(lr1, sid))
+        new = _time_all_states(lr1, lr1.outgoing)
+        print(f"{len(lr1.states):>7} {len(lr1.transitions):>7} {old:>10.3f} {new:>14.5f} {tables:>17.3f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--sizes', type=int, nargs='+', default=[100, 200, 400])
+    args = ap.parse_args()
+    run(args.sizes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Closure benchmark: worklist closure vs. the previous fixpoint closure.
+
+Usage (from the directory containing Trabajo_Compi_Python):
+    python -m Trabajo_Compi_Python.benchmarks.bench_closure --sizes 100 200 400
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Iterable, List, Set
+import argparse
+import sys
+import time
+
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from grammar import Grammar
+    from lr1 import LR1Builder
+    from grammars import statement_grammar
+else:
+    from ..grammar import Grammar
+    from ..lr1 import LR1Builder
+    from .grammars import statement_grammar
+
+
+def fixpoint_closure(lr1: LR1Builder, codes: Iterable[int]) -> Set[int]:
+    # Previous algorithm: rescan the whole set every round and, for each
+    # nonterminal after a dot, walk every production looking for its lhs.
+    T = lr1.n_terminals
+    I: Set[int] = set(codes)
+    changed = True
+    while changed:
+        changed = False
+        new_items: Set[int] = set()
+        for code in I:
+            core, la = divmod(code, T)
+            B = lr1.core_next[core]
+            if B < T:
+                continue
+            lookaheads = lr1.core_first[core]
+            if lr1.core_nullable[core]:
+                lookaheads = lookaheads | {la}
+            for p, lhs in enumerate(lr1.prod_lhs):
+                if lhs == B:
+                    base = lr1.core_base[p] * T
+                    for a in lookaheads:
+                        cand = base + a
+                        if cand not in I:
+                            new_items.add(cand)
+        if new_items:
+            before = len(I)
+            I.update(new_items)
+            if len(I) > before:
+                changed = True
+    return I
+
+
+def _kernels(lr1: LR1Builder) -> List[List[int]]:
+    # Kernel items of every state: dot > 0, or the augmented start item
+    T = lr1.n_terminals
+    out: List[List[int]] = []
+    for st in lr1.states:
+        out.append([c for c in st.codes if lr1.core_dot[c // T] > 0 or lr1.core_prod[c // T] == 0])
+    return out
+
+
+def _time_closures(kernels: List[List[int]], closure) -> float:
+    t0 = time.perf_counter()
+    for k in kernels:
+        closure(k)
+    return time.perf_counter() - t0
+
+
+def run(sizes: List[int], repeat: int) -> None:
+    # Closes the kernel of every state of the canonical collection with
+    # both algorithms, so only closure time is measured.
+    print(f"{'prods':>6} {'states':>7} {'fixpoint (s)':>13} {'worklist (s)':>13} {'speedup':>8}")
+    for n in sizes:
+        g = Grammar()
+        g.load_from_string(statement_grammar(n))
+        lr1 = LR1Builder(g)
+        lr1.build_canonical_collection()
+        kernels = _kernels(lr1)
+        old = min(_time_closures(kernels, lambda k: fixpoint_closure(lr1, k)) for _ in range(repeat))
+        new = min(_time_closures(kernels, lr1.closure_ids) for _ in range(repeat))
+        print(f"{len(lr1.productions):>6} {len(lr1.states):>7} {old:>13.3f} {new:>13.3f} {old / new:>7.1f}x")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--sizes', type=int, nargs='+', default=[100, 200, 400])
+    ap.add_argument('--repeat', type=int, default=1)
+    args = ap.parse_args()
+    run(args.sizes, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
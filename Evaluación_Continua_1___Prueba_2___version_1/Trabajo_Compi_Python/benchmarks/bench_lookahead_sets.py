@@ -0,0 +1,82 @@
+"""Item representation benchmark: one entry per (core, lookahead) vs. per core with a lookahead mask.
+
+Usage (from the directory containing Trabajo_Compi_Python):
+    python -m Trabajo_Compi_Python.benchmarks.bench_lookahead_sets --levels 4 8 16
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Iterable, List, Set
+import argparse
+import sys
+import time
+
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from grammar import Grammar
+    from lr1 import LR1Builder
+    from grammars import expression_grammar
+else:
+    from ..grammar import Grammar
+    from ..lr1 import LR1Builder
+    from .grammars import expression_grammar
+
+
+def item_closure(lr1: LR1Builder, codes: Iterable[int]) -> Set[int]:
+    # Previous algorithm: one integer per LR(1) item, expanded lookahead by lookahead
+    T = lr1.n_terminals
+    I: Set[int] = set(codes)
+    work: List[int] = list(I)
+    while work:
+        core, la = divmod(work.pop(), T)
+        B = lr1.core_next[core]
+        if B < T:
+            continue
+        lookaheads = lr1.core_first[core]
+        if lr1.core_nullable[core]:
+            lookaheads = lookaheads | {la}
+        for p in lr1.prods_by_lhs[B]:
+            base = lr1.core_base[p] * T
+            for a in lookaheads:
+                cand = base + a
+                if cand not in I:
+                    I.add(cand)
+                    work.append(cand)
+    return I
+
+
+def run(levels: List[int], repeat: int) -> None:
+    print(f"{'levels':>6} {'states':>7} {'items/state':>12} {'cores/state':>12} {'per item (s)':>13} {'per core (s)':>13}")
+    for n in levels:
+        g = Grammar()
+        g.load_from_string(expression_grammar(n))
+        lr1 = LR1Builder(g)
+        lr1.build_canonical_collection()
+        kernels = [st.kernel for st in lr1.states]
+        coded = [sorted(lr1.expand(k)) for k in kernels]
+        items = sum(len(st) for st in lr1.states) / len(lr1.states)
+        cores = sum(len(lr1.closure_sets(k)) for k in kernels) / len(lr1.states)
+
+        def timed(fn, inputs) -> float:
+            best = float('inf')
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                for k in inputs:
+                    fn(k)
+                best = min(best, time.perf_counter() - t0)
+            return best
+
+        old = timed(lambda k: item_closure(lr1, k), coded)
+        new = timed(lr1.closure_sets, kernels)
+        print(f"{n:>6} {len(lr1.states):>7} {items:>12.1f} {cores:>12.1f} {old:>13.3f} {new:>13.3f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--levels', type=int, nargs='+', default=[4, 8, 16])
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+    run(args.levels, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
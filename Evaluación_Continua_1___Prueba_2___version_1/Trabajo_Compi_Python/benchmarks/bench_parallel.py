@@ -0,0 +1,65 @@
+"""Canonical collection benchmark: serial build vs. process-pool waves per worker count.
+
+Usage (from the directory containing Trabajo_Compi_Python):
+    python -m Trabajo_Compi_Python.benchmarks.bench_parallel --sizes 1000 2000 --workers 1 2 4 8
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import List
+import argparse
+import os
+import sys
+import time
+
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from grammar import Grammar
+    from lr1 import LR1Builder
+    from grammars import statement_grammar
+else:
+    from ..grammar import Grammar
+    from ..lr1 import LR1Builder
+    from .grammars import statement_grammar
+
+
+def _build(g: Grammar, workers: int) -> LR1Builder:
+    lr1 = LR1Builder(g)
+    lr1.build_canonical_collection(workers=workers)
+    return lr1
+
+
+def run(sizes: List[int], workers: List[int], repeat: int) -> None:
+    # Times include starting the pool; every parallel build is checked
+    # against the serial one state by state.
+    print(f"{'prods':>6} {'states':>7} {'workers':>8} {'build (s)':>10} {'speedup':>8}")
+    for n in sizes:
+        g = Grammar()
+        g.load_from_string(statement_grammar(n))
+        serial = None
+        base = 0.0
+        for w in workers:
+            best = float('inf')
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                lr1 = _build(g, w)
+                best = min(best, time.perf_counter() - t0)
+            if serial is None:
+                serial, base = lr1, best
+            elif [st.kernel for st in lr1.states] != [st.kernel for st in serial.states] \
+                    or lr1.transitions != serial.transitions:
+                raise SystemExit(f"workers={w}: state numbering differs from the first build")
+            print(f"{len(lr1.productions):>6} {len(lr1.states):>7} {w:>8} {best:>10.3f} {base / best:>7.1f}x")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--sizes', type=int, nargs='+', default=[1000, 2000])
+    ap.add_argument('--workers', type=int, nargs='+',
+                    default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    ap.add_argument('--repeat', type=int, default=1)
+    args = ap.parse_args()
+    run(args.sizes, args.workers, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
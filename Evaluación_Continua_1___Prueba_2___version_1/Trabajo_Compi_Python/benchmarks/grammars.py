@@ -0,0 +1,54 @@
+"""Parameterized grammar generators for the benchmarks.
+
+Each function returns grammar text in the format of `gramatica.txt`, ready
+for `Grammar.load_from_string`.
+"""
+from __future__ import annotations
+from typing import List
+
+
+def expression_grammar(levels: int, ll1: bool = False) -> str:
+    # One binary operator per precedence level. Left associative and left
+    # recursive by default; ll1=True writes the same language with right
+    # recursive tails so the LL(1) table has no conflicts.
+    lines: List[str] = []
+    for i in range(levels):
+        nxt = f"E{i + 1}" if i + 1 < levels else "P"
+        if ll1:
+            lines.append(f"E{i} -> {nxt} R{i}")
+            lines.append(f"R{i} -> op{i} {nxt} R{i} | ''")
+        else:
+            lines.append(f"E{i} -> E{i} op{i} {nxt} | {nxt}")
+    lines.append("P -> ( E0 ) | id | num")
+    return "\n".join(lines)
+
+
+def statement_grammar(n: int) -> str:
+    # One production per keyword statement, plus a small expression core:
+    # roughly n + 15 productions, all reachable from the start symbol.
+    lines = [
+        "Prog -> Stmts",
+        "Stmts -> Stmts Stmt | Stmt",
+        "Stmt -> if ( E ) Stmt | while ( E ) Stmt | { Stmts } | id = E ;",
+    ]
+    for i in range(n):
+        lines.append(f"Stmt -> kw{i} ( Args ) ;")
+    lines += [
+        "Args -> Args , E | E | ''",
+        "E -> E + T | T",
+        "T -> T * F | F",
+        "F -> ( E ) | id | num",
+    ]
+    return "\n".join(lines)
+
+
+def explosive_grammar(n: int, levels: int = 3) -> str:
+    # n contexts open[i] E0 close[i] around one shared expression grammar.
+    # Each context gives E0 a different lookahead, so canonical LR(1)
+    # duplicates the whole expression automaton n times (LALR merges them).
+    lines = [f"S -> open{i} E0 close{i}" for i in range(n)]
+    for i in range(levels):
+        nxt = f"E{i + 1}" if i + 1 < levels else "P"
+        lines.append(f"E{i} -> E{i} op{i} {nxt} | {nxt}")
+    lines.append("P -> id | num")
+    return "\n".join(lines)
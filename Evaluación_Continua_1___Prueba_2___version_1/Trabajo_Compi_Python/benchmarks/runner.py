@@ -0,0 +1,215 @@
+"""Benchmark runner: build and parse phases on synthetic workloads, saved to JSON.
+
+Usage (from the directory containing Trabajo_Compi_Python):
+    python -m Trabajo_Compi_Python.benchmarks.runner --out baseline.json
+    python -m Trabajo_Compi_Python.benchmarks.runner --out now.json --baseline baseline.json
+
+Every phase is timed (best of --repeat runs) and then run once more under
+tracemalloc for its peak memory. With --baseline, phases slower than
+--threshold times the baseline are reported and the exit status is 1.
+"""
+from __future__ import annotations
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+import argparse
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from grammar import Grammar
+    from first import First
+    from follow import Follow
+    from table import Table
+    from parser import Parser
+    from lr1 import LR1Builder
+    from lr_parser import LRParser
+    from grammars import expression_grammar, statement_grammar, explosive_grammar
+    from sentences import SentenceGenerator
+else:
+    from ..grammar import Grammar
+    from ..first import First
+    from ..follow import Follow
+    from ..table import Table
+    from ..parser import Parser
+    from ..lr1 import LR1Builder
+    from ..lr_parser import LRParser
+    from .grammars import expression_grammar, statement_grammar, explosive_grammar
+    from .sentences import SentenceGenerator
+
+
+FORMAT_VERSION = 1
+# Phases faster than this in both runs are too noisy to compare
+MIN_COMPARABLE_SECONDS = 1e-3
+
+
+class Workload(NamedTuple):
+    name: str
+    grammar: str
+    ll1: bool  # also run the LL(1) predictive parser
+
+
+def workloads() -> List[Workload]:
+    sample = (Path(__file__).resolve().parent.parent / 'gramatica.txt').read_text(encoding='utf-8')
+    return [
+        Workload('gramatica', sample, True),
+        Workload('expr-8', expression_grammar(8), False),
+        Workload('expr-ll-8', expression_grammar(8, ll1=True), True),
+        Workload('stmt-200', statement_grammar(200), False),
+        Workload('explosive-40', explosive_grammar(40), False),
+    ]
+
+
+def measure(setup: Callable[[], Any], fn: Callable[[Any], Any], repeat: int) -> Dict[str, float]:
+    # setup runs outside both the timer and tracemalloc
+    best = float('inf')
+    for _ in range(repeat):
+        arg = setup()
+        t0 = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - t0)
+    arg = setup()
+    tracemalloc.start()
+    try:
+        fn(arg)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'seconds': best, 'peak_bytes': peak}
+
+
+def _quiet(fn: Callable[[], Any]) -> Any:
+    # The console parsers print every step; keep that out of the report
+    with redirect_stdout(io.StringIO()):
+        return fn()
+
+
+def run_workload(w: Workload, length: int, repeat: int, seed: int) -> Dict[str, Any]:
+    g = Grammar()
+    g.load_from_string(w.grammar)
+    tokens = SentenceGenerator(g, seed).sentence(length)
+
+    def builder() -> LR1Builder:
+        return LR1Builder(g)
+
+    def collection() -> LR1Builder:
+        lr1 = LR1Builder(g)
+        lr1.build_canonical_collection()
+        return lr1
+
+    def tables() -> LR1Builder:
+        lr1 = collection()
+        lr1.build_tables()
+        return lr1
+
+    built = tables()
+    if built.conflicts:
+        raise ValueError(f"{w.name}: la gramática tiene conflictos LR(1)")
+    phases: Dict[str, Dict[str, float]] = {
+        'first': measure(lambda: First(g), lambda f: f.compute(), repeat),
+        'canonical_collection': measure(builder, lambda lr1: lr1.build_canonical_collection(), repeat),
+        'build_tables': measure(collection, lambda lr1: lr1.build_tables(), repeat),
+        'lr_parse': measure(lambda: LRParser(built), lambda p: _quiet(lambda: p.parse(tokens)), repeat),
+        'lr_run': measure(lambda: LRParser(built), lambda p: p.run(tokens), repeat),
+    }
+    if w.ll1:
+        first = First(g)
+        first.compute()
+        follow = Follow(g, first)
+        follow.compute()
+        table = Table(g, first, follow)
+        start = table.getNonTerminalId(g.initialState)
+        phases['ll_parse'] = measure(lambda: Parser(table, start), lambda p: _quiet(lambda: p.parse(tokens)), repeat)
+        phases['ll_run'] = measure(lambda: Parser(table, start), lambda p: p.run(tokens), repeat)
+        if not Parser(table, start).run(tokens).accepted:
+            raise ValueError(f"{w.name}: la oración generada no fue aceptada por LL(1)")
+
+    # Results are only meaningful if the sentence was accepted
+    if not LRParser(built).run(tokens).accepted:
+        raise ValueError(f"{w.name}: la oración generada no fue aceptada")
+    return {
+        'productions': len(built.productions),
+        'states': len(built.states),
+        'tokens': len(tokens),
+        'phases': phases,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print current vs. baseline per phase; returns the regressions found."""
+    regressions: List[str] = []
+    print(f"\n{'workload':<14} {'phase':<22} {'base (s)':>10} {'now (s)':>10} {'ratio':>7} {'peak ratio':>11}")
+    for name, w in current['workloads'].items():
+        base_w = baseline.get('workloads', {}).get(name)
+        if base_w is None:
+            continue
+        for phase, m in w['phases'].items():
+            b = base_w['phases'].get(phase)
+            if b is None:
+                continue
+            ratio = m['seconds'] / b['seconds'] if b['seconds'] else float('inf')
+            mem = m['peak_bytes'] / b['peak_bytes'] if b['peak_bytes'] else float('inf')
+            flag = ''
+            if ratio > threshold and max(m['seconds'], b['seconds']) >= MIN_COMPARABLE_SECONDS:
+                flag = '  <-- regresión'
+                regressions.append(f"{name}/{phase}: {ratio:.2f}x")
+            print(f"{name:<14} {phase:<22} {b['seconds']:>10.4f} {m['seconds']:>10.4f} {ratio:>6.2f}x {mem:>10.2f}x{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--out', help="archivo JSON donde guardar los resultados")
+    ap.add_argument('--baseline', help="resultados anteriores con los que comparar")
+    ap.add_argument('--threshold', type=float, default=1.25, help="razón de tiempo considerada regresión")
+    # The console parsers print the remaining input at every step, so their
+    # cost grows with the square of the length
+    ap.add_argument('--length', type=int, default=500, help="tokens por oración de entrada")
+    ap.add_argument('--repeat', type=int, default=3)
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--only', nargs='+', help="nombres de los workloads a ejecutar")
+    args = ap.parse_args(argv)
+
+    results: Dict[str, Any] = {
+        'version': FORMAT_VERSION,
+        'python': platform.python_version(),
+        'length': args.length,
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'workloads': {},
+    }
+    print(f"{'workload':<14} {'phase':<22} {'seconds':>10} {'peak KiB':>10}")
+    for w in workloads():
+        if args.only and w.name not in args.only:
+            continue
+        r = run_workload(w, args.length, args.repeat, args.seed)
+        results['workloads'][w.name] = r
+        for phase, m in r['phases'].items():
+            print(f"{w.name:<14} {phase:<22} {m['seconds']:>10.4f} {m['peak_bytes'] / 1024:>10.1f}")
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('version') != FORMAT_VERSION:
+            print(f"Versión de baseline incompatible: {baseline.get('version')}")
+            return 2
+        for key in ('length', 'seed'):
+            if baseline.get(key) != results[key]:
+                print(f"Aviso: baseline con {key}={baseline.get(key)}, ahora {key}={results[key]}")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regresión(es): " + ', '.join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
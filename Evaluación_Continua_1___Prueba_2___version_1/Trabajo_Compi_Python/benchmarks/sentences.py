@@ -0,0 +1,146 @@
+"""Random sentences of a chosen length from any Grammar.
+
+Usage (from the directory containing Trabajo_Compi_Python):
+    python -m Trabajo_Compi_Python.benchmarks.sentences Trabajo_Compi_Python/gramatica.txt --length 20
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import argparse
+import random
+import sys
+
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from grammar import Grammar
+else:
+    from ..grammar import Grammar
+
+
+class SentenceGenerator:
+    """Leftmost random derivations steered towards a target length.
+
+    Every nonterminal knows its shortest yield and a production that
+    reaches it. While the committed length (tokens emitted plus the
+    shortest yield of everything still pending) is below the target,
+    productions are picked at random, favouring those that grow the
+    sentence; once it is reached, only shortest productions are used, so
+    the result overshoots the target by at most one expansion.
+    """
+
+    ATTEMPTS = 16
+
+    def __init__(self, grammar: Grammar, seed: Optional[int] = None) -> None:
+        self.start = grammar.initialState
+        self.rng = random.Random(seed)
+        nts = grammar.nonTerminals
+        self.prods: Dict[str, List[Tuple[str, ...]]] = {A: [] for A in nts}
+        for lhs, rhs in grammar.productions():
+            self.prods[lhs].append(rhs)
+
+        # Shortest yield per nonterminal by fixpoint. The production that
+        # last lowered it is kept as witness; witnesses only point to
+        # nonterminals settled earlier, so following them always ends.
+        inf = float('inf')
+        self.shortest: Dict[str, float] = {A: inf for A in nts}
+        self.witness: Dict[str, Tuple[str, ...]] = {}
+        changed = True
+        while changed:
+            changed = False
+            for A, alts in self.prods.items():
+                for rhs in alts:
+                    n = self._length(rhs)
+                    if n < self.shortest[A]:
+                        self.shortest[A] = n
+                        self.witness[A] = rhs
+                        changed = True
+        if self.shortest.get(self.start, inf) == inf:
+            raise ValueError(f"El símbolo inicial {self.start} no deriva ninguna cadena")
+        # Productions through nonterminals that derive nothing are never usable
+        for A, alts in self.prods.items():
+            self.prods[A] = [rhs for rhs in alts if self._length(rhs) < inf]
+
+        # Nonterminals that can derive something longer than their shortest
+        # yield, directly or through another such nonterminal
+        self.grows: Dict[str, bool] = {A: False for A in nts}
+        changed = True
+        while changed:
+            changed = False
+            for A, alts in self.prods.items():
+                if not self.grows[A] and any(self._keeps_growing(A, rhs) for rhs in alts):
+                    self.grows[A] = changed = True
+
+    def _length(self, rhs: Tuple[str, ...]) -> float:
+        shortest = self.shortest
+        return sum(shortest[X] if X in shortest else 1 for X in rhs)
+
+    def _keeps_growing(self, A: str, rhs: Tuple[str, ...]) -> bool:
+        return self._length(rhs) > self.shortest[A] or any(self.grows.get(X, False) for X in rhs)
+
+    def _derive(self, length: int) -> List[str]:
+        rng = self.rng
+        shortest, grows = self.shortest, self.grows
+        out: List[str] = []
+        stack: List[str] = [self.start]
+        committed = shortest[self.start]
+        # pending nonterminals that can still make the sentence longer
+        open_ = 1 if grows[self.start] else 0
+        while stack:
+            X = stack.pop()
+            if X not in shortest:
+                out.append(X)
+                continue
+            if grows[X]:
+                open_ -= 1
+            base = shortest[X]
+            if committed < length:
+                alts = self.prods[X]
+                growing = [rhs for rhs in alts if self._length(rhs) > base]
+                rhs = rng.choice(growing if growing and rng.random() < 0.5 else alts)
+                if not open_ and grows[X] and not self._keeps_growing(X, rhs):
+                    # this was the last way to get longer: keep it open
+                    rhs = rng.choice([r for r in alts if self._keeps_growing(X, r)])
+            else:
+                rhs = self.witness[X]
+            committed += self._length(rhs) - base
+            open_ += sum(1 for Y in rhs if grows.get(Y, False))
+            stack.extend(reversed(rhs))
+        return out
+
+    def sentence(self, length: int) -> List[str]:
+        """Terminal tokens of one sentence with at least `length` tokens.
+
+        A few derivations are tried; if none reaches the target (the
+        language may not have sentences that long) the longest is returned.
+        """
+        best: List[str] = []
+        for _ in range(self.ATTEMPTS):
+            out = self._derive(length)
+            if len(out) >= length:
+                return out
+            if len(out) > len(best):
+                best = out
+        return best
+
+
+def random_sentence(grammar: Grammar, length: int, seed: Optional[int] = None) -> List[str]:
+    return SentenceGenerator(grammar, seed).sentence(length)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('grammar', help="archivo de gramática")
+    ap.add_argument('--length', type=int, default=20)
+    ap.add_argument('--count', type=int, default=1)
+    ap.add_argument('--seed', type=int)
+    args = ap.parse_args()
+    g = Grammar()
+    if not g.load_from_file(args.grammar):
+        raise SystemExit(1)
+    gen = SentenceGenerator(g, args.seed)
+    for _ in range(args.count):
+        print(' '.join(gen.sentence(args.length)))
+
+
+if __name__ == '__main__':
+    main()
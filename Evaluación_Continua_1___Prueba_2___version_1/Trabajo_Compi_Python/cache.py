@@ -0,0 +1,206 @@
+from __future__ import annotations
+from collections import OrderedDict
+from concurrent.futures import Executor, Future
+from typing import Callable, Dict, List, Optional, Tuple
+import hashlib
+import threading
+
+# Dual-imports to support running as script or module
+if __package__ is None or __package__ == "":
+    from grammar import Grammar
+    from lr1 import LR1Builder
+    from utils import trim, split
+else:
+    from .grammar import Grammar
+    from .lr1 import LR1Builder
+    from .utils import trim, split
+
+
+def normalize_grammar_text(text: str) -> str:
+    """Canonical form of a grammar text: same productions -> same string.
+
+    Blank lines and comments are dropped and whitespace around symbols,
+    arrows and alternatives is collapsed. Rule order is kept because it
+    fixes the start symbol and the production numbering. Lexer lines (%token,
+    %ignore) go first, verbatim, since their patterns may hold spaces.
+    """
+    lex: List[str] = []
+    lines: List[str] = []
+    for raw in text.splitlines():
+        line = trim(raw)
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('%'):
+            lex.append(line)
+            continue
+        pos = line.find('->')
+        if pos == -1:
+            lines.append(' '.join(split(line, ' ')))
+            continue
+        lhs = trim(line[:pos])
+        alts = [' '.join(split(trim(alt), ' ')) for alt in split(trim(line[pos+2:]), '|')]
+        lines.append(f"{lhs} -> {' | '.join(alts)}")
+    return '\n'.join(lex + lines)
+
+
+def grammar_key(text: str) -> str:
+    return hashlib.sha256(normalize_grammar_text(text).encode('utf-8')).hexdigest()
+
+
+def estimate_builder_size(lr1: LR1Builder) -> int:
+    # Rough resident size in bytes; only used to enforce the memory cap.
+    # States keep only their kernels; closures live in a bounded cache.
+    # Entries are (core, lookahead mask) pairs, one per core rather than per item.
+    items = sum(len(st.kernel) for st in lr1.states) + sum(len(c) for c in lr1._closure_cache.values())
+    return (
+        items * 240
+        + len(lr1.transitions) * 120
+        + len(lr1.ACTION) * 150
+        + len(lr1.GOTO) * 120
+        + len(lr1.productions) * 150
+    )
+
+
+def build_grammar(grammar_text: str, mode: str = 'lr1') -> Tuple[Grammar, LR1Builder]:
+    # Load and fully build a grammar; ValueError if it cannot be loaded
+    g = Grammar()
+    if not g.load_from_string(grammar_text):
+        raise ValueError("No se pudo cargar la gramática.")
+    if not g.initialState:
+        raise ValueError("La gramática no tiene producciones.")
+    lr1 = LR1Builder(g, mode=mode)
+    lr1.build_canonical_collection()
+    lr1.build_tables()
+    return g, lr1
+
+
+def _build_in_worker(build: Callable[[str, str], Tuple[Grammar, LR1Builder]],
+                     grammar_text: str, mode: str) -> Tuple[Grammar, LR1Builder]:
+    # Runs in a pool process; the closure memo is rebuilt on demand, so it
+    # is not worth pickling back
+    g, lr1 = build(grammar_text, mode)
+    lr1._closure_cache.clear()
+    return g, lr1
+
+
+class GrammarCache:
+    """LRU cache of built (Grammar, LR1Builder) pairs keyed by mode and grammar hash.
+
+    Bounded both by number of entries and by an estimated memory budget.
+    Concurrent misses for the same grammar are collapsed into one build.
+    With an executor, builds run there (`build` must then be picklable,
+    e.g. a module-level function) and the calling thread only waits;
+    otherwise the first caller builds inline.
+    """
+
+    def __init__(self, build: Callable[[str, str], Tuple[Grammar, LR1Builder]],
+                 max_entries: int = 64, max_bytes: int = 256 * 1024 * 1024,
+                 executor: Optional[Executor] = None,
+                 on_build: Optional[Callable[[str, LR1Builder], None]] = None) -> None:
+        self.build = build
+        self.executor = executor
+        # called with (mode, builder) after every successful build
+        self.on_build = on_build
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Grammar, LR1Builder, int]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+
+    def get(self, grammar_text: str, mode: str = 'lr1') -> Tuple[Grammar, LR1Builder]:
+        return self.submit(grammar_text, mode).result()
+
+    def submit(self, grammar_text: str, mode: str = 'lr1') -> "Future[Tuple[Grammar, LR1Builder]]":
+        """Future of the built grammar: already done on a hit, shared while in flight.
+
+        Cancelling the future of a build that has not started yet (queued in
+        the executor) drops it for every caller sharing it.
+        """
+        key = f"{mode}:{grammar_key(grammar_text)}"
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                done: Future = Future()
+                done.set_result((entry[0], entry[1]))
+                return done
+            flight = self._inflight.get(key)
+            if flight is not None:
+                # Someone else is already building it; share that build
+                self.coalesced += 1
+                return flight
+            self.misses += 1
+            if self.executor is not None:
+                flight = self.executor.submit(_build_in_worker, self.build, grammar_text, mode)
+            else:
+                flight = Future()
+            self._inflight[key] = flight
+
+        # Outside the lock: the callback runs right away if the build is done
+        flight.add_done_callback(lambda f: self._finish(key, mode, f))
+        if self.executor is None:
+            flight.set_running_or_notify_cancel()
+            try:
+                flight.set_result(self.build(grammar_text, mode))
+            except BaseException as e:
+                flight.set_exception(e)
+        return flight
+
+    def lookup(self, digest: str, mode: str = 'lr1') -> Optional[Tuple[Grammar, LR1Builder]]:
+        # Built grammar by its grammar_key, without building on a miss
+        key = f"{mode}:{digest}"
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def _finish(self, key: str, mode: str, flight: Future) -> None:
+        with self._lock:
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+        if flight.cancelled() or flight.exception() is not None:
+            return
+        g, lr1 = flight.result()
+        if self.on_build is not None:
+            self.on_build(mode, lr1)
+        size = estimate_builder_size(lr1)
+        with self._lock:
+            if size <= self.max_bytes and key not in self._entries:
+                self._entries[key] = (g, lr1, size)
+                self.bytes += size
+                self._evict()
+
+    def _evict(self) -> None:
+        # Caller holds the lock
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+            _, (_, _, size) = self._entries.popitem(last=False)
+            self.bytes -= size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "coalesced": self.coalesced,
+                "inflight": len(self._inflight),
+            }
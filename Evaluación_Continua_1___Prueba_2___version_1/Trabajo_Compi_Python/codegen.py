@@ -0,0 +1,196 @@
+from __future__ import annotations
+from typing import Dict, List
+import os
+import tempfile
+
+# Dual-imports to support running as script or module
+if __package__ is None or __package__ == "":
+    from lr_parser import ParseTables
+    from lexer import Lexer
+    from cache import grammar_key
+else:
+    from .lr_parser import ParseTables
+    from .lexer import Lexer
+    from .cache import grammar_key
+
+
+# The generated module only imports `re` (and only when the grammar has a
+# lexer). Tables use the ParseTables encoding: ACTION[s][terminal] is v > 0
+# shift to v-1, v < 0 reduce production -v-1, 0 accept; GOTO[s][lhs id] is
+# the target state.
+_DRIVER = '''
+
+class Result:
+    __slots__ = ('accepted', 'error_pos', 'error_token', 'expected', 'tree', 'value')
+
+    def __init__(self, accepted, error_pos=None, error_token=None, expected=(), tree=None, value=None):
+        self.accepted = accepted
+        self.error_pos = error_pos
+        self.error_token = error_token
+        self.expected = list(expected)
+        self.tree = tree
+        self.value = value
+
+    def __repr__(self):
+        if self.accepted:
+            return 'Result(accepted=True)'
+        return f'Result(accepted=False, error_pos={self.error_pos}, error_token={self.error_token!r})'
+
+
+def parse(tokens, build_tree=False, actions=None, lexemes=None):
+    """Parse a sequence of terminal names; '$' is implied at the end.
+
+    build_tree: the result carries a (label, children) tuple tree.
+    actions: {production index or text: fn(*rhs values)} evaluated on reduce,
+    yacc style ($$ = $1 when a production has none); the start symbol's value
+    ends up in `value`. Terminals' values are `lexemes[i]` if given, else
+    the tokens themselves.
+    """
+    fns = None
+    if actions is not None:
+        if build_tree:
+            raise ValueError("actions cannot be combined with build_tree")
+        fns = [None] * len(PROD_LEN)
+        for key, fn in actions.items():
+            i = PROD_INDEX.get(' '.join(key.split())) if isinstance(key, str) else key
+            if i is None or not 0 <= i < len(PROD_LEN):
+                raise ValueError(f"Unknown production: {key}")
+            fns[i] = fn
+    keep = build_tree or fns is not None
+    action, goto, prod_len, prod_lhs = ACTION, GOTO, PROD_LEN, PROD_LHS
+    n = len(tokens)
+    stack = [0]
+    values = []
+    ip = 0
+    a = tokens[0] if n else '$'
+    while True:
+        s = stack[-1]
+        v = action[s].get(a)
+        if v is None:
+            return Result(False, ip, a, sorted(action[s]))
+        if v > 0:
+            stack.append(v - 1)
+            if keep:
+                if build_tree:
+                    values.append((a, ()))
+                else:
+                    values.append(lexemes[ip] if lexemes is not None and ip < n else a)
+            ip += 1
+            a = tokens[ip] if ip < n else '$'
+        elif v < 0:
+            p = -v - 1
+            k = prod_len[p]
+            if k:
+                del stack[-k:]
+            if keep:
+                args = values[-k:] if k else []
+                if k:
+                    del values[-k:]
+                if build_tree:
+                    values.append((NONTERMINALS[prod_lhs[p]], tuple(args)))
+                else:
+                    fn = fns[p]
+                    values.append(fn(*args) if fn is not None else (args[0] if args else None))
+            j = goto[stack[-1]].get(prod_lhs[p])
+            if j is None:
+                return Result(False, ip, a, sorted(action[s]))
+            stack.append(j)
+        else:
+            top = values[-1] if values else None
+            return Result(True, tree=top if build_tree else None, value=None if build_tree else top)
+'''
+
+_LEXER = '''
+
+_MASTER = re.compile(LEX_PATTERN)
+
+
+def tokenize(text):
+    """Yield (type, value, pos) with the grammar's longest-match rules."""
+    match = _MASTER.match
+    groups = list(zip(LEX_GROUPS, LEX_NAMES))
+    n = len(text)
+    pos = 0
+    while pos < n:
+        m = match(text, pos)
+        best_end, best_name, found = pos, None, False
+        for g, name in groups:
+            e = m.end(g)
+            if e > best_end:
+                best_end, best_name, found = e, name, True
+        if not found:
+            raise ValueError(f"Unexpected character {text[pos]!r} at {pos}")
+        if best_name is not None:
+            yield best_name, text[pos:best_end], pos
+        pos = best_end
+
+
+def parse_text(text, build_tree=False, actions=None):
+    toks = list(tokenize(text))
+    return parse([t for t, _, _ in toks], build_tree, actions, [v for _, v, _ in toks])
+'''
+
+
+def _literal(name: str, value) -> str:
+    return f"{name} = {value!r}\n"
+
+
+def generate_parser_source(lr1) -> str:
+    """Source of a standalone parser module for a built LR1Builder or CompiledTables."""
+    if not lr1.ACTION:
+        if not lr1.states:
+            lr1.build_canonical_collection()
+        lr1.build_tables()
+    t = ParseTables.of(lr1)
+    nonterminals: List[str] = sorted(set(t.prod_lhs))
+    nt_index = {A: i for i, A in enumerate(nonterminals)}
+    goto: List[Dict[int, int]] = [{nt_index[A]: j for A, j in sorted(row.items())} for row in t.goto]
+    action: List[Dict[str, int]] = [dict(sorted(row.items())) for row in t.action]
+    grammar = getattr(lr1, 'grammar', None)
+    rules = list(grammar.rules) if grammar is not None else list(lr1.rules)
+    lex = list(grammar.lexRules) if grammar is not None else list(lr1.lex_rules)
+    lexer = Lexer.of(lr1)
+
+    out: List[str] = [
+        '"""LR parser generated by Trabajo_Compi_Python.codegen. Do not edit.\n\n',
+        f'Mode: {lr1.mode}. Grammar key: {grammar_key(chr(10).join(lex + rules))}.\n',
+        '"""\n',
+        'import re\n\n' if lexer is not None else '',
+        _literal('RULES', tuple(lex + rules)),
+        _literal('PRODUCTIONS', tuple(str(p) for p in t.productions)),
+        _literal('NONTERMINALS', tuple(nonterminals)),
+        _literal('PROD_LEN', tuple(t.prod_len)),
+        _literal('PROD_LHS', tuple(nt_index[A] for A in t.prod_lhs)),
+        'PROD_INDEX = {p: i for i, p in enumerate(PRODUCTIONS)}\n',
+        'ACTION = (\n',
+        *(f"    {row!r},\n" for row in action),
+        ')\n',
+        'GOTO = (\n',
+        *(f"    {row!r},\n" for row in goto),
+        ')\n',
+        _DRIVER,
+    ]
+    if lexer is not None:
+        out += [
+            '\n\n',
+            _literal('LEX_PATTERN', lexer.master.pattern),
+            _literal('LEX_NAMES', tuple(lexer.names)),
+            _literal('LEX_GROUPS', tuple(lexer._groups)),
+            _LEXER,
+        ]
+    return ''.join(out)
+
+
+def write_parser_module(lr1, path: str) -> None:
+    source = generate_parser_source(lr1)
+    compile(source, path, 'exec')  # fail here, not at import time
+    # Write under a private name, then rename: importers never see a partial file
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(source)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
@@ -1,81 +1,157 @@
 from __future__ import annotations
-from typing import Dict, Set, List
+from typing import Dict, Set, List, Tuple
 if __package__ is None or __package__ == "":
     from grammar import Grammar
-    from utils import trim, split
+    from utils import strongly_connected_components
 else:
     from .grammar import Grammar
-    from .utils import trim, split
+    from .utils import strongly_connected_components
 
 
 class First:
+    """FIRST sets as integer bitsets over terminals.
+
+    The rules are parsed once into structured productions. Nullable
+    nonterminals come from a counting worklist; FIRST is then solved on the
+    "A starts with B" graph one strongly connected component at a time, in
+    dependency order, so every component is visited once. `firstSets` keeps
+    the classic set view ('' marks a nullable nonterminal).
+    """
+
     def __init__(self, grammar: Grammar) -> None:
         self.grammar = grammar
         self.firstSets: Dict[str, Set[str]] = {}
+        # Structured form, filled by compute()
+        self.terminals: List[str] = []  # bit i <-> terminals[i]
+        self.terminal_bit: Dict[str, int] = {}
+        self.productions: List[Tuple[str, Tuple[str, ...]]] = []
+        self.nullable: Set[str] = set()
+        self.first_bits: Dict[str, int] = {}
+        # Per production: FIRST bits and nullability of rhs[i:] for every i
+        self.suffix_first: List[List[int]] = []
+        self.suffix_nullable: List[List[bool]] = []
+
+    def _terminal(self, sym: str) -> str:
+        # 'x' in a rule stands for the terminal x
+        if len(sym) >= 2 and sym[0] == "'" and sym[-1] == "'":
+            return sym[1:-1]
+        return sym
+
+    def bit(self, terminal: str) -> int:
+        i = self.terminal_bit.get(terminal)
+        if i is None:
+            i = len(self.terminals)
+            self.terminal_bit[terminal] = i
+            self.terminals.append(terminal)
+        return 1 << i
+
+    def names(self, bits: int) -> Set[str]:
+        out: Set[str] = set()
+        while bits:
+            low = bits & -bits
+            out.add(self.terminals[low.bit_length() - 1])
+            bits ^= low
+        return out
 
     def compute(self) -> None:
-        for nt_raw in self.grammar.nonTerminals:
-            nt = trim(nt_raw)
-            self.firstSets[nt] = set()
+        nts = self.grammar.nonTerminals
+        self.productions = self.grammar.productions()
+        for t in sorted(self.grammar.terminals):
+            self.bit(t)
+
+        # Nullable: a production fires once all of its rhs symbols are nullable
+        missing: List[int] = []
+        uses: Dict[str, List[int]] = {}
+        nullable: Set[str] = set()
+        work: List[str] = []
+        for p, (lhs, rhs) in enumerate(self.productions):
+            if any(s not in nts for s in rhs):
+                missing.append(-1)
+                continue
+            missing.append(len(rhs))
+            for s in rhs:
+                uses.setdefault(s, []).append(p)
+            if not rhs and lhs not in nullable:
+                nullable.add(lhs)
+                work.append(lhs)
+        while work:
+            B = work.pop()
+            for p in uses.get(B, ()):
+                missing[p] -= 1
+                lhs = self.productions[p][0]
+                if missing[p] == 0 and lhs not in nullable:
+                    nullable.add(lhs)
+                    work.append(lhs)
+        self.nullable = nullable
+
+        # FIRST: direct terminals plus edges A -> B for every B that can start A
+        order = sorted(nts)
+        idx = {A: i for i, A in enumerate(order)}
+        direct = [0] * len(order)
+        succ: List[List[int]] = [[] for _ in order]
+        for lhs, rhs in self.productions:
+            a = idx[lhs]
+            for s in rhs:
+                if s in nts:
+                    succ[a].append(idx[s])
+                    if s not in nullable:
+                        break
+                else:
+                    direct[a] |= self.bit(self._terminal(s))
+                    break
+        first = [0] * len(order)
+        comp_of = [0] * len(order)
+        for c, comp in enumerate(strongly_connected_components(len(order), succ)):
+            # Successors outside the component are already final
+            bits = 0
+            for a in comp:
+                comp_of[a] = c
+                bits |= direct[a]
+            for a in comp:
+                for b in succ[a]:
+                    if comp_of[b] != c:
+                        bits |= first[b]
+            for a in comp:
+                first[a] = bits
+        self.first_bits = {A: first[idx[A]] for A in order}
+
+        # FIRST of every production suffix, right to left
+        self.suffix_first = []
+        self.suffix_nullable = []
+        for _, rhs in self.productions:
+            fs = [0] * (len(rhs) + 1)
+            ns = [False] * (len(rhs) + 1)
+            ns[len(rhs)] = True
+            for i in range(len(rhs) - 1, -1, -1):
+                bits, vanish = self.first_of_symbol(rhs[i])
+                fs[i] = bits | (fs[i + 1] if vanish else 0)
+                ns[i] = vanish and ns[i + 1]
+            self.suffix_first.append(fs)
+            self.suffix_nullable.append(ns)
+
+        self.firstSets = {}
+        for A in order:
+            s = self.names(self.first_bits[A])
+            if A in nullable:
+                s.add("''")
+            self.firstSets[A] = s
+
+    def first_of_symbol(self, sym: str) -> Tuple[int, bool]:
+        if sym in self.first_bits:
+            return self.first_bits[sym], sym in self.nullable
+        return self.bit(self._terminal(sym)), False
 
-        changed = True
-        while changed:
-            changed = False
-            for r in self.grammar.rules:
-                line = trim(r)
-                if not line:
-                    continue
-                pos = line.find('->')
-                if pos == -1:
-                    continue
-                left = trim(line[:pos])
-                right = trim(line[pos+2:])
-                alternatives = split(right, '|')
-                for alt in alternatives:
-                    symbols = split(trim(alt), ' ')
-                    if not symbols:
-                        continue
-                    allEmpty = True
-                    for sym in symbols:
-                        sym = trim(sym)
-                        if not sym:
-                            continue
-                        if sym == "''":
-                            continue
-                        elif len(sym) >= 2 and sym[0] == "'" and sym[-1] == "'":
-                            contenido = sym[1:-1]
-                            if contenido:
-                                before = len(self.firstSets[left])
-                                self.firstSets[left].add(contenido)
-                                if len(self.firstSets[left]) > before:
-                                    changed = True
-                            allEmpty = False
-                            break
-                        elif sym in self.grammar.nonTerminals:
-                            before = len(self.firstSets[left])
-                            for t in self.firstSets.get(sym, set()):
-                                if t != "''":
-                                    self.firstSets[left].add(t)
-                            if len(self.firstSets[left]) > before:
-                                changed = True
-                            xiNullable = ("''" in self.firstSets.get(sym, set()))
-                            if not xiNullable:
-                                allEmpty = False
-                                break
-                        else:
-                            before = len(self.firstSets[left])
-                            self.firstSets[left].add(sym)
-                            if len(self.firstSets[left]) > before:
-                                changed = True
-                            allEmpty = False
-                            break
-                    if allEmpty:
-                        if "''" not in self.firstSets[left]:
-                            self.firstSets[left].add("''")
-                            changed = True
+    def first_of(self, symbols: Tuple[str, ...]) -> Tuple[int, bool]:
+        """FIRST bits of a symbol sequence and whether it can vanish."""
+        bits = 0
+        for s in symbols:
+            b, vanish = self.first_of_symbol(s)
+            bits |= b
+            if not vanish:
+                return bits, False
+        return bits, True
 
     def print(self) -> None:
         for nt, s in self.firstSets.items():
-            nt = trim(nt)
             items = ", ".join(list(s))
             print(f"First({nt}) = {{ {items} }}")
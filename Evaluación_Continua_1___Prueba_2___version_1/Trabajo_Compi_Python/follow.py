@@ -2,83 +2,63 @@ from __future__ import annotations
 from typing import Dict, Set, List
 if __package__ is None or __package__ == "":
     from grammar import Grammar
-    from utils import trim, split
     from first import First
+    from utils import strongly_connected_components
 else:
     from .grammar import Grammar
-    from .utils import trim, split
     from .first import First
+    from .utils import strongly_connected_components
 
 
 class Follow:
+    """FOLLOW sets as bitsets, built on First's structured productions.
+
+    For A -> α B β, FOLLOW(B) gets FIRST(β) directly and depends on
+    FOLLOW(A) when β is nullable. The dependency graph is solved one
+    strongly connected component at a time, in dependency order.
+    """
+
     def __init__(self, grammar: Grammar, first: First) -> None:
         self.grammar = grammar
         self.first = first
         self.followSets: Dict[str, Set[str]] = {}
+        self.follow_bits: Dict[str, int] = {}
 
     def compute(self) -> None:
-        for nt in self.grammar.nonTerminals:
-            self.followSets[nt] = set()
-        self.followSets[self.grammar.initialState].add('$')
-
-        changed = True
-        while changed:
-            changed = False
-            for r in self.grammar.rules:
-                line = trim(r)
-                if not line:
-                    continue
-                pos = line.find('->')
-                if pos == -1:
+        nts = self.grammar.nonTerminals
+        first = self.first
+        order = sorted(nts)
+        idx = {A: i for i, A in enumerate(order)}
+        base = [0] * len(order)
+        # needs[b]: nonterminals whose FOLLOW is included in FOLLOW(b)
+        needs: List[List[int]] = [[] for _ in order]
+        if self.grammar.initialState in idx:
+            base[idx[self.grammar.initialState]] |= first.bit('$')
+        for p, (lhs, rhs) in enumerate(first.productions):
+            fs, ns = first.suffix_first[p], first.suffix_nullable[p]
+            for i, B in enumerate(rhs):
+                if B not in nts:
                     continue
-                left = trim(line[:pos])
-                right = trim(line[pos+2:])
-                alternatives = split(right, '|')
-                for alt in alternatives:
-                    symbols = split(trim(alt), ' ')
-                    n = len(symbols)
-                    nullableSuffix = [False] * (n + 1)
-                    nullableSuffix[n] = True
-
-                    for j in range(n - 1, -1, -1):
-                        s = trim(symbols[j])
-                        tieneEps = False
-                        if s == "''":
-                            tieneEps = True
-                        elif s in self.grammar.nonTerminals:
-                            fset = self.first.firstSets.get(s, set())
-                            tieneEps = ("''" in fset)
-                        else:
-                            tieneEps = False
-                        nullableSuffix[j] = tieneEps and nullableSuffix[j + 1]
-
-                    for i in range(n):
-                        A = trim(symbols[i])
-                        if not A or A not in self.grammar.nonTerminals:
-                            continue
-
-                        if i + 1 < n:
-                            nextSym = trim(symbols[i + 1])
-                            firstNext: Set[str] = set()
-                            if len(nextSym) >= 2 and nextSym[0] == "'" and nextSym[-1] == "'":
-                                firstNext.add(nextSym[1:-1])
-                            elif nextSym in self.grammar.nonTerminals:
-                                firstNext = set(self.first.firstSets.get(nextSym, set()))
-                            else:
-                                firstNext.add(nextSym)
-                            before = len(self.followSets[A])
-                            for s in firstNext:
-                                if s != "''":
-                                    self.followSets[A].add(s)
-                            if len(self.followSets[A]) > before:
-                                changed = True
+                b = idx[B]
+                base[b] |= fs[i + 1]
+                if ns[i + 1] and lhs != B:
+                    needs[b].append(idx[lhs])
 
-                        epsInGamma = nullableSuffix[i + 1]
-                        if epsInGamma:
-                            before = len(self.followSets[A])
-                            self.followSets[A].update(self.followSets[left])
-                            if len(self.followSets[A]) > before:
-                                changed = True
+        follow = [0] * len(order)
+        comp_of = [0] * len(order)
+        for c, comp in enumerate(strongly_connected_components(len(order), needs)):
+            bits = 0
+            for b in comp:
+                comp_of[b] = c
+                bits |= base[b]
+            for b in comp:
+                for a in needs[b]:
+                    if comp_of[a] != c:
+                        bits |= follow[a]
+            for b in comp:
+                follow[b] = bits
+        self.follow_bits = {A: follow[idx[A]] for A in order}
+        self.followSets = {A: first.names(self.follow_bits[A]) for A in order}
 
     def print(self) -> None:
         for nt, s in self.followSets.items():
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import List, Set
+from typing import List, Set, Tuple
 import os, sys
 if __package__ is None or __package__ == "":
     from utils import trim, split
@@ -13,6 +13,8 @@ class Grammar:
         self.nonTerminals: Set[str] = set()
         self.initialState: str = ''
         self.rules: List[str] = []
+        # %token / %ignore lines, consumed by lexer.Lexer
+        self.lexRules: List[str] = []
 
     def load_from_file(self, filename: str) -> bool:
         try:
@@ -22,6 +24,9 @@ class Grammar:
                     line = trim(raw)
                     if not line or line.startswith('#'):
                         continue
+                    if line.startswith('%'):
+                        self.lexRules.append(line)
+                        continue
                     self.rules.append(line)
 
                     pos = line.find('->')
@@ -53,6 +58,22 @@ class Grammar:
             print(f"Error al abrir archivo: {filename}: {e}")
             return False
 
+    def productions(self) -> List[Tuple[str, Tuple[str, ...]]]:
+        """Rules split into (lhs, rhs symbols), one entry per alternative.
+
+        Epsilon markers ('' and ε) are dropped, so an empty production has an
+        empty rhs.
+        """
+        out: List[Tuple[str, Tuple[str, ...]]] = []
+        for rule in self.rules:
+            pos = rule.find('->')
+            if pos == -1:
+                continue
+            lhs = trim(rule[:pos])
+            for alt in trim(rule[pos+2:]).split('|'):
+                out.append((lhs, tuple(s for s in split(trim(alt), ' ') if s != "''" and s != 'ε')))
+        return out
+
     def print(self) -> None:
         print(f"Estado inicial: {self.initialState}")
         print("No terminales: ", end='')
@@ -75,12 +96,16 @@ class Grammar:
             self.nonTerminals.clear()
             self.initialState = ''
             self.rules.clear()
+            self.lexRules.clear()
 
             rhs_symbols: List[str] = []
             for raw in text.splitlines():
                 line = trim(raw)
                 if not line or line.startswith('#'):
                     continue
+                if line.startswith('%'):
+                    self.lexRules.append(line)
+                    continue
                 self.rules.append(line)
 
                 pos = line.find('->')
@@ -0,0 +1,155 @@
+from __future__ import annotations
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+import threading
+import time
+import uuid
+
+# Dual-imports to support running as script or module
+if __package__ is None or __package__ == "":
+    from cache import GrammarCache, grammar_key
+else:
+    from .cache import GrammarCache, grammar_key
+
+
+class LimitedExecutor(Executor):
+    """Runs at most `limit` calls at a time on `inner`, queueing the rest here.
+
+    Pools hand work to their processes ahead of time, so their futures
+    can no longer be cancelled once submitted. Futures returned here stay
+    pending, and cancellable, until a slot frees up.
+    """
+
+    def __init__(self, inner: Executor, limit: int) -> None:
+        self.inner = inner
+        self.limit = max(1, limit)
+        self._queue: Deque[Tuple[Future, Callable, tuple, dict]] = deque()
+        self._running = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        outer: Future = Future()
+        with self._lock:
+            self._queue.append((outer, fn, args, kwargs))
+        self._dispatch()
+        return outer
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._lock:
+                if self._running >= self.limit or not self._queue:
+                    return
+                outer, fn, args, kwargs = self._queue.popleft()
+                if not outer.set_running_or_notify_cancel():
+                    continue  # cancelled while queued
+                self._running += 1
+            try:
+                inner = self.inner.submit(fn, *args, **kwargs)
+            except BaseException as e:
+                self._done(outer, None, e)
+                continue
+            inner.add_done_callback(lambda f, outer=outer: self._relay(outer, f))
+
+    def _relay(self, outer: Future, inner: Future) -> None:
+        if inner.cancelled():
+            self._done(outer, None, RuntimeError("La construcción fue interrumpida."))
+        else:
+            self._done(outer, inner.result() if inner.exception() is None else None, inner.exception())
+
+    def _done(self, outer: Future, result, error: Optional[BaseException]) -> None:
+        with self._lock:
+            self._running -= 1
+        if error is not None:
+            outer.set_exception(error)
+        else:
+            outer.set_result(result)
+        self._dispatch()
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        if cancel_futures:
+            with self._lock:
+                pending, self._queue = list(self._queue), deque()
+            for outer, _, _, _ in pending:
+                outer.cancel()
+        # at most `limit` calls ever reach the inner pool
+        self.inner.shutdown(wait=wait)
+
+
+class BuildJob:
+    def __init__(self, mode: str, key: str, future: Future) -> None:
+        self.id = uuid.uuid4().hex
+        self.mode = mode
+        self.key = key
+        self.future = future
+        self.created = time.time()
+
+    @property
+    def status(self) -> str:
+        f = self.future
+        if f.cancelled():
+            return "cancelled"
+        if f.done():
+            return "failed" if f.exception() is not None else "done"
+        return "running" if f.running() else "queued"
+
+    def to_json(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"id": self.id, "mode": self.mode, "status": self.status}
+        if out["status"] == "failed":
+            out["error"] = str(self.future.exception())
+        return out
+
+
+class BuildJobs:
+    """Asynchronous grammar builds on top of a GrammarCache.
+
+    A job wraps the cache's build future, so a grammar already in flight
+    (from another job or a synchronous request) is built once and gets the
+    same job. Finished jobs are kept, most recent first, up to `max_jobs`.
+    """
+
+    def __init__(self, cache: GrammarCache, max_jobs: int = 256, max_pending: int = 64) -> None:
+        self.cache = cache
+        self.max_jobs = max_jobs
+        self.max_pending = max_pending
+        self._jobs: "OrderedDict[str, BuildJob]" = OrderedDict()
+        self._pending: Dict[str, BuildJob] = {}  # "mode:hash" -> unfinished job
+        self._lock = threading.Lock()
+
+    def submit(self, grammar_text: str, mode: str = 'lr1') -> BuildJob:
+        # RuntimeError when too many jobs are already waiting
+        key = f"{mode}:{grammar_key(grammar_text)}"
+        with self._lock:
+            job = self._pending.get(key)
+            if job is not None and not job.future.done():
+                return job
+            if len(self._pending) >= self.max_pending:
+                raise RuntimeError("Demasiadas construcciones pendientes; intente más tarde.")
+            job = BuildJob(mode, key, self.cache.submit(grammar_text, mode))
+            self._jobs[job.id] = job
+            self._pending[key] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        job.future.add_done_callback(lambda f: self._settle(job))
+        return job
+
+    def _settle(self, job: BuildJob) -> None:
+        with self._lock:
+            if self._pending.get(job.key) is job:
+                del self._pending[job.key]
+
+    def get(self, job_id: str) -> Optional[BuildJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[bool]:
+        """True if the job was cancelled (or already was), False if it is
+        running or finished, None if there is no such job."""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        return job.future.cancel() or job.future.cancelled()
@@ -0,0 +1,141 @@
+from __future__ import annotations
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+import re
+import weakref
+
+# Terminal definitions live next to the productions, one per line:
+#   %token NUM /[0-9]+/
+#   %token ARROW "->"
+#   %ignore /\s+/
+# Grammar terminals without a %token line match their own name literally.
+# Without any %ignore line, whitespace is skipped.
+DEFAULT_IGNORE = r'\s+'
+
+
+class Token(NamedTuple):
+    type: str
+    value: str
+    pos: int  # offset of the first character
+    end: int
+    line: int  # 1-based
+    col: int  # 1-based
+
+
+class LexError(ValueError):
+    def __init__(self, message: str, pos: int, line: int, col: int) -> None:
+        super().__init__(message)
+        self.pos = pos
+        self.line = line
+        self.col = col
+
+
+def _parse_rule(line: str) -> Tuple[str, Optional[str], str, Optional[str]]:
+    # -> (kind, name, regex, literal text or None)
+    parts = line.split(None, 1)
+    kind = parts[0]
+    rest = parts[1].strip() if len(parts) > 1 else ''
+    name = None
+    if kind == '%token':
+        fields = rest.split(None, 1)
+        if len(fields) != 2:
+            raise ValueError(f"Definición de token inválida: {line}")
+        name, rest = fields[0], fields[1].strip()
+    elif kind != '%ignore':
+        raise ValueError(f"Directiva léxica desconocida: {kind}")
+    if len(rest) >= 2 and rest[0] == rest[-1] == '/':
+        return kind, name, rest[1:-1], None
+    if len(rest) >= 2 and rest[0] == rest[-1] and rest[0] in '"\'':
+        return kind, name, re.escape(rest[1:-1]), rest[1:-1]
+    raise ValueError(f"Patrón inválido (use /regex/ o \"literal\"): {line}")
+
+
+class Lexer:
+    """Longest-match lexer compiled into one master regex.
+
+    Every rule sits in the master pattern as an optional lookahead with its
+    own group, so a single match at the current offset reports how far each
+    rule reaches. The longest match wins; ties go to literals over regexes,
+    then to the earlier definition. Tokens are produced lazily.
+    """
+
+    _cache: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    def __init__(self, rules: Iterable[str], terminals: Iterable[str] = ()) -> None:
+        literals: List[Tuple[Optional[str], str, int]] = []
+        regexes: List[Tuple[Optional[str], str, int]] = []
+        defined = set()
+        has_ignore = False
+        for line in rules:
+            kind, name, pattern, literal = _parse_rule(line)
+            if kind == '%ignore':
+                has_ignore = True
+            else:
+                defined.add(name)
+            if re.compile(pattern).fullmatch(''):
+                raise ValueError(f"El patrón no puede aceptar la cadena vacía: {line}")
+            if literal is None:
+                regexes.append((name, pattern, 0))
+            else:
+                literals.append((name, pattern, len(literal)))
+        for t in sorted(terminals):
+            if t not in defined:
+                literals.append((t, re.escape(t), len(t)))
+        if not has_ignore:
+            regexes.append((None, DEFAULT_IGNORE, 0))
+
+        # Longer literals first among literals; a name of None means "skip"
+        literals.sort(key=lambda r: -r[2])
+        ordered = literals + regexes
+        self.names: List[Optional[str]] = [name for name, _, _ in ordered]
+        self.master = re.compile(''.join(f"(?:(?=(?P<_t{i}>{p})))?" for i, (_, p, _) in enumerate(ordered)))
+        self._groups: List[int] = [self.master.groupindex[f"_t{i}"] for i in range(len(ordered))]
+
+    @classmethod
+    def from_grammar(cls, grammar) -> "Lexer":
+        return cls(grammar.lexRules, grammar.terminals)
+
+    @classmethod
+    def of(cls, lr1) -> Optional["Lexer"]:
+        """Lexer for an LR1Builder or CompiledTables, built once per tables object.
+
+        None when the grammar has no %token / %ignore lines: its input is
+        then tokenized by whitespace as before.
+        """
+        if lr1 in cls._cache:
+            return cls._cache[lr1]
+        grammar = getattr(lr1, 'grammar', None)
+        if grammar is not None:
+            rules, terminals = grammar.lexRules, grammar.terminals
+        else:
+            rules, terminals = lr1.lex_rules, lr1.terminals
+        lexer = cls(rules, terminals) if rules else None
+        cls._cache[lr1] = lexer
+        return lexer
+
+    def tokens(self, text: str) -> Iterator[Token]:
+        match = self.master.match
+        groups = list(zip(self._groups, self.names))
+        n = len(text)
+        pos = 0
+        line, line_start = 1, 0
+        while pos < n:
+            m = match(text, pos)
+            best_end, best_name, found = pos, None, False
+            for g, name in groups:
+                e = m.end(g)
+                if e > best_end:
+                    best_end, best_name, found = e, name, True
+            if not found:
+                raise LexError(f"Carácter inesperado {text[pos]!r} en línea {line}, columna {pos - line_start + 1}",
+                               pos, line, pos - line_start + 1)
+            if best_name is not None:
+                yield Token(best_name, text[pos:best_end], pos, best_end, line, pos - line_start + 1)
+            nl = text.count('\n', pos, best_end)
+            if nl:
+                line += nl
+                line_start = text.rfind('\n', pos, best_end) + 1
+            pos = best_end
+
+    def types(self, text: str) -> List[str]:
+        # Token types only, in the shape LRParser.run expects
+        return [tok.type for tok in self.tokens(text)]
@@ -1,6 +1,9 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Dict, List, Set, Tuple, Iterable
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple, Iterable
+import time
 
 # Dual-imports to support running as script or module
 if __package__ is None or __package__ == "":
@@ -36,19 +39,88 @@ class LR1Item:
         return f"[{self.lhs} -> {rhs_str}, {self.la}]"
 
 
+@dataclass
+class BuildStats:
+    """Phase timings and counters of one LR1Builder, filled while it builds.
+
+    Closure counters include closures done by pool workers in parallel
+    builds; peak_item_set is the largest closure seen, in LR(1) items.
+    `LR1Builder.stats` keeps counting the closures that state views expand
+    later on; `LR1Builder.build_stats` is its snapshot when build_tables ends.
+    """
+    first_seconds: float = 0.0
+    collection_seconds: float = 0.0
+    tables_seconds: float = 0.0
+    closure_calls: int = 0
+    closure_cache_hits: int = 0
+    items_created: int = 0
+    empty_gotos: int = 0
+    peak_item_set: int = 0
+    states: int = 0
+    transitions: int = 0
+    conflicts: int = 0
+
+    def absorb(self, other: "BuildStats") -> None:
+        # Closure counters of another builder (a pool worker)
+        self.closure_calls += other.closure_calls
+        self.closure_cache_hits += other.closure_cache_hits
+        self.items_created += other.items_created
+        self.empty_gotos += other.empty_gotos
+        self.peak_item_set = max(self.peak_item_set, other.peak_item_set)
+
+    def _closed(self, items: int) -> None:
+        self.closure_calls += 1
+        self.items_created += items
+        if items > self.peak_item_set:
+            self.peak_item_set = items
+
+    def to_json(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def server_timing(self) -> str:
+        # Server-Timing header value, durations in milliseconds
+        return ', '.join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in (
+            ('first', self.first_seconds),
+            ('collection', self.collection_seconds),
+            ('tables', self.tables_seconds),
+        ))
+
+
+# (core, lookahead mask) pairs sorted by core; see LR1Builder.closure_sets
+Kernel = Tuple[Tuple[int, int], ...]
+
+
 class LR1State:
-    def __init__(self, items: Iterable[LR1Item], sid: int = -1) -> None:
+    # Only the kernel is stored, one entry per item core with its lookaheads
+    # as a bitmask (see LR1Builder._intern). The closure is expanded on demand
+    # through the builder's memoized closure, and the LR1Item view is decoded
+    # for printing and serialization.
+    def __init__(self, kernel: Kernel, sid: int = -1, builder: Optional["LR1Builder"] = None) -> None:
         self.id = sid
-        self.items: Set[LR1Item] = set(items)
+        self.kernel: Kernel = kernel
+        self.builder = builder
+        # Completed cores of the closure, recorded while the collection is
+        # built so that build_tables does not need to close the state again
+        self.complete: Tuple[Tuple[int, int], ...] = ()
+    @property
+    def codes(self) -> FrozenSet[int]:
+        # One integer per LR(1) item: core * n_terminals + lookahead
+        return frozenset(self.builder.expand(self.builder.closure_of(self.kernel)))
+    @property
+    def items(self) -> Set[LR1Item]:
+        return {self.builder.decode_item(c) for c in self.codes}
+    @property
+    def kernel_items(self) -> Set[LR1Item]:
+        return {self.builder.decode_item(c) for c in self.builder.expand(self.kernel)}
     def __iter__(self):
         return iter(self.items)
     def __len__(self):
-        return len(self.items)
+        return sum(_popcount(mask) for _, mask in self.builder.closure_of(self.kernel))
     def __eq__(self, other: object) -> bool:
-        return isinstance(other, LR1State) and self.items == other.items
+        # In LR(1) the kernel determines the closure
+        return isinstance(other, LR1State) and self.kernel == other.kernel
     def __hash__(self) -> int:
-        # Hash by frozenset of items
-        return hash(frozenset(self.items))
+        return hash(self.kernel)
     def pretty(self) -> str:
         lines = [f"State I{self.id}:"]
         for it in sorted(self.items, key=lambda x: (x.lhs, x.rhs, x.dot, x.la)):
@@ -56,30 +128,88 @@ class LR1State:
         return '\n'.join(lines)
 
 
+MODES = ('lr1', 'lalr')
+
+
+def _bit_ids(bits: int) -> List[int]:
+    # Positions of the set bits, lowest first
+    out: List[int] = []
+    while bits:
+        low = bits & -bits
+        out.append(low.bit_length() - 1)
+        bits ^= low
+    return out
+
+
+# Number of set bits; int.bit_count needs Python 3.10
+_popcount = getattr(int, 'bit_count', None) or (lambda bits: bin(bits).count('1'))
+
+
+# Frontier waves smaller than this are closed in the parent process
+PARALLEL_MIN_WAVE = 64
+
+# Builder of a pool worker, made once per process by _init_worker
+_worker_builder: Optional["LR1Builder"] = None
+
+
+def _init_worker(rules: List[str]) -> None:
+    global _worker_builder
+    g = Grammar()
+    g.load_from_string('\n'.join(rules))
+    _worker_builder = LR1Builder(g)
+
+
+def _expand_kernels(kernels: List[Kernel]) -> Tuple[List[Tuple[Tuple[Tuple[int, int], ...], List[Tuple[int, Kernel]]]], BuildStats]:
+    # Symbol and core ids are derived from sorted names, so kernels mean the
+    # same thing in every process. Counters are per call, for the parent.
+    b = _worker_builder
+    b.stats = BuildStats()
+    return [b._expand_kernel(K) for K in kernels], b.stats
+
+
 class LR1Builder:
-    def __init__(self, grammar: Grammar) -> None:
+    def __init__(self, grammar: Grammar, closure_cache_size: int = 256, mode: str = 'lr1') -> None:
+        # mode 'lr1' builds the canonical collection; 'lalr' builds the LR(0)
+        # automaton and computes LALR(1) lookaheads by propagation.
+        if mode not in MODES:
+            raise ValueError(f"Modo de construcción desconocido: {mode} (use {', '.join(MODES)})")
+        self.mode = mode
         self.grammar = grammar
+        self.stats = BuildStats()
+        # Frozen copy of `stats` taken at the end of build_tables
+        self.build_stats: Optional[BuildStats] = None
+        t0 = time.perf_counter()
         self.first = First(grammar)
         self.first.compute()
+        self.stats.first_seconds = time.perf_counter() - t0
 
         # Build production list (including augmented start)
         self.start_symbol = grammar.initialState
         self.aug_start = self.start_symbol + "'"
-        while self.aug_start in grammar.nonTerminals:
+        while self.aug_start in grammar.nonTerminals or self.aug_start in grammar.terminals:
             self.aug_start += "'"
 
         # Build structured productions
         self.productions: List[Production] = []
         self._build_productions()
+        self._intern()
 
         # Canonical collection
         self.states: List[LR1State] = []
         self.transitions: Dict[Tuple[int, str], int] = {}
+        # Per-state outgoing edges [(symbol, target)] in symbol-name order,
+        # filled alongside `transitions`
+        self.adjacency: List[List[Tuple[str, int]]] = []
+        # kernel -> closure, LRU-bounded
+        self.closure_cache_size = closure_cache_size
+        self._closure_cache: "OrderedDict[Kernel, Tuple[Tuple[int, int], ...]]" = OrderedDict()
 
         # Parsing tables
         self.ACTION: Dict[Tuple[int, str], Tuple[str, object]] = {}
         self.GOTO: Dict[Tuple[int, str], int] = {}
         self.conflicts: List[str] = []
+        # (state, lookahead, kept action, rejected action), aligned with `conflicts`
+        self.conflict_details: List[Tuple[int, str, Tuple[str, object], Tuple[str, object]]] = []
 
     # -------------------- helpers --------------------
     def _build_productions(self) -> None:
@@ -97,141 +227,555 @@ class LR1Builder:
                 if alt == '' or alt == "''" or alt == 'ε':
                     self.productions.append(Production(lhs, tuple()))
                 else:
-                    symbols = tuple(s for s in alt.split(' ') if s)
+                    symbols = tuple(s for s in alt.split(' ') if s and s != "''" and s != 'ε')
                     self.productions.append(Production(lhs, symbols))
 
+    def _intern(self) -> None:
+        # Integer ids for symbols: terminals first (sorted), then nonterminals,
+        # with the augmented start last. id < n_terminals <=> terminal.
+        terms = sorted(self.grammar.terminals - self.grammar.nonTerminals)
+        nts = sorted(self.grammar.nonTerminals) + [self.aug_start]
+        self.symbols: List[str] = terms + nts
+        self.symbol_id: Dict[str, int] = {s: i for i, s in enumerate(self.symbols)}
+        self.n_terminals = len(terms)
+        self.eof = self.symbol_id['$']
+        # position of each symbol in name order; successors are visited in
+        # this order so state numbering does not depend on the id layout
+        self.symbol_rank: List[int] = [0] * len(self.symbols)
+        for r, X in enumerate(sorted(range(len(self.symbols)), key=self.symbols.__getitem__)):
+            self.symbol_rank[X] = r
+
+        self.prod_lhs: List[int] = [self.symbol_id[p.lhs] for p in self.productions]
+        self.prod_rhs: List[Tuple[int, ...]] = [tuple(self.symbol_id[s] for s in p.rhs) for p in self.productions]
+        # lhs symbol id -> ids of its productions
+        self.prods_by_lhs: List[List[int]] = [[] for _ in self.symbols]
+        for p, A in enumerate(self.prod_lhs):
+            self.prods_by_lhs[A].append(p)
+
+        # Item cores (production, dot) get dense ids: core_base[p] + dot, so
+        # advancing the dot is core + 1. An LR(1) item is core * n_terminals + la.
+        # FIRST of each symbol as a bitset over terminal ids (bit a <-> id a)
+        T = self.n_terminals
+        first = self.first
+        self.first_bits: List[int] = [1 << X if X < T else 0 for X in range(len(self.symbols))]
+        self.nullable: List[bool] = [False] * len(self.symbols)
+        for A in self.grammar.nonTerminals:
+            X = self.symbol_id[A]
+            self.first_bits[X] = sum(1 << self.symbol_id[a] for a in first.names(first.first_bits.get(A, 0))
+                                     if a in self.symbol_id)
+            self.nullable[X] = A in first.nullable
+        self.core_base: List[int] = []
+        self.core_prod: List[int] = []
+        self.core_dot: List[int] = []
+        self.core_next: List[int] = []      # symbol after the dot, -1 at the end
+        self.core_first_bits: List[int] = []  # FIRST of what follows that symbol
+        self.core_first: List[FrozenSet[int]] = []  # same, as terminal ids
+        self.core_nullable: List[bool] = []  # whether what follows can vanish
+        as_ids: Dict[int, FrozenSet[int]] = {}
+        for p, rhs in enumerate(self.prod_rhs):
+            n = len(rhs)
+            self.core_base.append(len(self.core_prod))
+            # suffix[i]: FIRST(rhs[i:]) and whether rhs[i:] vanishes, right to left
+            bits = [0] * (n + 2)
+            vanish = [True] * (n + 2)
+            for i in range(n - 1, -1, -1):
+                X = rhs[i]
+                bits[i] = self.first_bits[X] | (bits[i + 1] if self.nullable[X] else 0)
+                vanish[i] = self.nullable[X] and vanish[i + 1]
+            for dot in range(n + 1):
+                self.core_prod.append(p)
+                self.core_dot.append(dot)
+                self.core_next.append(rhs[dot] if dot < n else -1)
+                fb = bits[dot + 1] if dot < n else 0
+                ids = as_ids.get(fb)
+                if ids is None:
+                    ids = as_ids[fb] = frozenset(_bit_ids(fb))
+                self.core_first_bits.append(fb)
+                self.core_first.append(ids)
+                self.core_nullable.append(vanish[dot + 1] if dot < n else True)
+
+    def decode_item(self, code: int) -> LR1Item:
+        core, la = divmod(code, self.n_terminals)
+        prod = self.productions[self.core_prod[core]]
+        return LR1Item(prod.lhs, prod.rhs, self.core_dot[core], self.symbols[la])
+
+    def encode_item(self, it: LR1Item) -> int:
+        p = self.productions.index(Production(it.lhs, it.rhs))
+        return (self.core_base[p] + it.dot) * self.n_terminals + self.symbol_id[it.la]
+
     def _is_nonterminal(self, sym: str) -> bool:
         return sym in self.grammar.nonTerminals or sym == self.aug_start
 
     def first_of_sequence(self, seq: List[str], lookahead: str) -> Set[str]:
         # Compute FIRST(seq · lookahead)
-        result: Set[str] = set()
-        if not seq:
-            result.add(lookahead)
-            return result
+        bits = 0
         for s in seq:
             if s == "''":
                 continue
-            # terminal
-            if (s in self.grammar.terminals) and (s not in self.grammar.nonTerminals):
-                result.add(s)
-                return result
-            # non-terminal
-            if self._is_nonterminal(s):
-                fset = self.first.firstSets.get(s, set())
-                result.update(x for x in fset if x != "''")
-                if "''" not in fset:
-                    return result
-            else:
+            X = self.symbol_id.get(s)
+            if X is None:
                 # unknown symbol: treat as terminal
-                result.add(s)
-                return result
+                return {self.symbols[a] for a in _bit_ids(bits)} | {s}
+            bits |= self.first_bits[X]
+            if not self.nullable[X]:
+                return {self.symbols[a] for a in _bit_ids(bits)}
         # all nullable
-        result.add(lookahead)
-        return result
+        return {self.symbols[a] for a in _bit_ids(bits)} | {lookahead}
 
     # -------------------- closure/goto --------------------
-    def closure(self, items: Iterable[LR1Item]) -> Set[LR1Item]:
-        I: Set[LR1Item] = set(items)
-        changed = True
-        while changed:
-            changed = False
-            new_items: Set[LR1Item] = set()
-            for it in I:
-                # if dot before a nonterminal B
-                if it.dot < len(it.rhs):
-                    B = it.rhs[it.dot]
-                    if self._is_nonterminal(B):
-                        beta = list(it.rhs[it.dot+1:])
-                        lookaheads = self.first_of_sequence(beta, it.la)
-                        for prod in self.productions:
-                            if prod.lhs == B:
-                                for a in lookaheads:
-                                    cand = LR1Item(B, prod.rhs, 0, a)
-                                    if cand not in I:
-                                        new_items.add(cand)
-            if new_items:
-                before = len(I)
-                I.update(new_items)
-                if len(I) > before:
-                    changed = True
+    # Item sets are stored per core: a kernel is a tuple of (core, lookahead
+    # mask) pairs sorted by core, where bit a of the mask is terminal id a.
+    # Closure and goto move whole lookahead masks at once.
+    def closure_sets(self, kernel: Iterable[Tuple[int, int]]) -> Dict[int, int]:
+        # Worklist closure; a core is expanded again only if its mask grew
+        T = self.n_terminals
+        core_next, core_first, core_nullable = self.core_next, self.core_first_bits, self.core_nullable
+        prods_by_lhs, core_base = self.prods_by_lhs, self.core_base
+        I: Dict[int, int] = dict(kernel)
+        work: List[int] = list(I)
+        while work:
+            core = work.pop()
+            # if dot before a nonterminal B
+            B = core_next[core]
+            if B < T:
+                continue
+            las = core_first[core]
+            if core_nullable[core]:
+                las |= I[core]
+            for p in prods_by_lhs[B]:
+                c0 = core_base[p]
+                old = I.get(c0)
+                if old is None:
+                    I[c0] = las
+                    work.append(c0)
+                elif old | las != old:
+                    I[c0] = old | las
+                    work.append(c0)
+        self.stats._closed(sum(map(_popcount, I.values())))
         return I
 
+    def closure_ids(self, codes: Iterable[int]) -> Set[int]:
+        # Item-code view of closure_sets (code = core * n_terminals + la)
+        return self.expand(self.closure_sets(self.pack(codes)).items())
+
+    def pack(self, codes: Iterable[int]) -> Kernel:
+        T = self.n_terminals
+        masks: Dict[int, int] = {}
+        for code in codes:
+            core, la = divmod(code, T)
+            masks[core] = masks.get(core, 0) | (1 << la)
+        return tuple(sorted(masks.items()))
+
+    def expand(self, pairs: Iterable[Tuple[int, int]]) -> Set[int]:
+        T = self.n_terminals
+        return {core * T + la for core, mask in pairs for la in _bit_ids(mask)}
+
+    def closure_of(self, kernel: Kernel) -> Tuple[Tuple[int, int], ...]:
+        # Memoized closure of a state kernel. A built builder is shared by
+        # request threads without a lock, so another thread may evict an
+        # entry between our lookup and the LRU bookkeeping: tolerate that.
+        cache = self._closure_cache
+        closed = cache.get(kernel)
+        if closed is not None:
+            try:
+                cache.move_to_end(kernel)
+            except KeyError:
+                pass
+            self.stats.closure_cache_hits += 1
+            return closed
+        closed = tuple(self.closure_sets(kernel).items())
+        cache[kernel] = closed
+        while len(cache) > self.closure_cache_size:
+            try:
+                cache.popitem(last=False)
+            except KeyError:
+                break
+        return closed
+
+    def goto_kernel(self, closed: Iterable[Tuple[int, int]], X: int) -> Kernel:
+        # same production, dot + 1 is the next core id
+        moved = tuple(sorted((core + 1, mask) for core, mask in closed if self.core_next[core] == X))
+        if not moved:
+            self.stats.empty_gotos += 1
+        return moved
+
+    def successors(self, closed: Iterable[Tuple[int, int]]) -> List[Tuple[int, Kernel]]:
+        """Goto kernels of a closed item set for every symbol after a dot.
+
+        One pass groups the cores by the symbol after the dot, so symbols
+        that do not appear are never visited. Ordered by symbol name.
+        """
+        core_next = self.core_next
+        groups: Dict[int, List[Tuple[int, int]]] = {}
+        for core, mask in closed:
+            X = core_next[core]
+            if X < 0:
+                continue
+            moved = groups.get(X)
+            if moved is None:
+                groups[X] = [(core + 1, mask)]
+            else:
+                moved.append((core + 1, mask))
+        rank = self.symbol_rank
+        out: List[Tuple[int, Kernel]] = []
+        for X in sorted(groups, key=rank.__getitem__):
+            moved = groups[X]
+            moved.sort()
+            out.append((X, tuple(moved)))
+        return out
+
+    def closure(self, items: Iterable[LR1Item]) -> Set[LR1Item]:
+        return {self.decode_item(c) for c in self.closure_ids(self.encode_item(it) for it in items)}
+
     def goto(self, items: Iterable[LR1Item], X: str) -> Set[LR1Item]:
-        moved: Set[LR1Item] = set()
-        for it in items:
-            if it.dot < len(it.rhs) and it.rhs[it.dot] == X:
-                moved.add(LR1Item(it.lhs, it.rhs, it.dot+1, it.la))
+        closed = self.pack(self.encode_item(it) for it in items)
+        moved = self.goto_kernel(closed, self.symbol_id[X])
         if not moved:
             return set()
-        return self.closure(moved)
+        return {self.decode_item(c) for c in self.expand(self.closure_of(moved))}
+
+    def _complete(self, closed: Iterable[Tuple[int, int]]) -> Tuple[Tuple[int, int], ...]:
+        return tuple((core, mask) for core, mask in closed if self.core_next[core] == -1)
 
     # -------------------- canonical collection --------------------
-    def build_canonical_collection(self) -> None:
-        I0 = self.closure({LR1Item(self.aug_start, (self.start_symbol,), 0, '$')})
+    def build_canonical_collection(self, workers: int = 1) -> None:
+        """Build the LR(1) collection (or the LALR(1) one in 'lalr' mode).
+
+        workers > 1 closes states in a process pool, one frontier wave at a
+        time; state numbering is the same as with a single worker. LALR
+        builds always run in-process.
+        """
+        t0 = time.perf_counter()
+        if self.mode == 'lalr':
+            self._build_lalr_collection()
+        else:
+            K0: Kernel = ((self.core_base[0], 1 << self.eof),)
+            if workers > 1:
+                expanded = self._expand_parallel(K0, workers)
+                self._number_states(K0, expanded.__getitem__)
+            else:
+                self._number_states(K0, self._expand_kernel)
+        self.stats.collection_seconds = time.perf_counter() - t0
+        self.stats.states = len(self.states)
+        self.stats.transitions = len(self.transitions)
+
+    def _expand_kernel(self, kernel: Kernel) -> Tuple[Tuple[Tuple[int, int], ...], List[Tuple[int, Kernel]]]:
+        # -> (complete items, goto kernels by symbol) of one state
+        I = self.closure_of(kernel)
+        return self._complete(I), self.successors(I)
+
+    def _number_states(self, K0: Kernel, expand) -> None:
+        # States are identified by their kernel; a goto whose kernel is
+        # already known never gets closed again. `expand` only has to be a
+        # function of the kernel, so any way of computing it numbers the
+        # states identically.
         states: List[LR1State] = []
-        state_map: Dict[frozenset, int] = {}
+        state_map: Dict[Kernel, int] = {}
 
-        def get_state_id(itemset: Set[LR1Item]) -> int:
-            key = frozenset(itemset)
-            if key in state_map:
-                return state_map[key]
+        def get_state_id(kernel: Kernel) -> Tuple[int, bool]:
+            if kernel in state_map:
+                return state_map[kernel], False
             sid = len(states)
-            st = LR1State(itemset, sid)
+            st = LR1State(kernel, sid, self)
             states.append(st)
-            state_map[key] = sid
-            return sid
+            self.adjacency.append([])
+            state_map[kernel] = sid
+            return sid, True
 
         worklist: List[int] = []
-        s0 = get_state_id(I0)
+        s0, _ = get_state_id(K0)
         worklist.append(s0)
 
-        all_symbols = sorted(list(self.grammar.nonTerminals | self.grammar.terminals | {self.aug_start}))
-
         while worklist:
             sid = worklist.pop()
-            I = states[sid].items
-            for X in all_symbols:
-                J = self.goto(I, X)
-                if not J:
-                    continue
-                jid = get_state_id(J)
-                if (sid, X) not in self.transitions:
-                    self.transitions[(sid, X)] = jid
-                if jid >= len(states) - 1:  # newly created
+            complete, successors = expand(states[sid].kernel)
+            states[sid].complete = complete
+            for X, J in successors:
+                jid, created = get_state_id(J)
+                key = (sid, self.symbols[X])
+                if key not in self.transitions:
+                    self.transitions[key] = jid
+                    self.adjacency[sid].append((key[1], jid))
+                if created:
                     worklist.append(jid)
 
         # assign final
         self.states = states
 
+    def _expand_parallel(self, K0: Kernel, workers: int) -> Dict[Kernel, Tuple[Tuple[Tuple[int, int], ...], List[Tuple[int, Kernel]]]]:
+        # Breadth-first waves: every kernel of the frontier is closed in the
+        # pool, new goto kernels are deduplicated here and form the next wave.
+        # Ids are handed out afterwards by _number_states.
+        expanded: Dict[Kernel, Tuple[Tuple[Tuple[int, int], ...], List[Tuple[int, Kernel]]]] = {}
+        seen: Set[Kernel] = {K0}
+        frontier: List[Kernel] = [K0]
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(list(self.grammar.rules),)) as pool:
+            while frontier:
+                if len(frontier) < PARALLEL_MIN_WAVE:
+                    # not worth the round trip to the pool
+                    results = [self._expand_kernel(K) for K in frontier]
+                else:
+                    size = -(-len(frontier) // (workers * 4))
+                    chunks = [frontier[i:i + size] for i in range(0, len(frontier), size)]
+                    results = []
+                    for part, stats in pool.map(_expand_kernels, chunks):
+                        results += part
+                        self.stats.absorb(stats)
+                nxt: List[Kernel] = []
+                for K, result in zip(frontier, results):
+                    expanded[K] = result
+                    for _, J in result[1]:
+                        if J not in seen:
+                            seen.add(J)
+                            nxt.append(J)
+                frontier = nxt
+        return expanded
+
+    # -------------------- LALR(1) --------------------
+    def _closure0(self, cores: Iterable[int]) -> Set[int]:
+        # LR(0) closure over item cores
+        T = self.n_terminals
+        C: Set[int] = set(cores)
+        work: List[int] = list(C)
+        while work:
+            B = self.core_next[work.pop()]
+            if B < T:
+                continue
+            for p in self.prods_by_lhs[B]:
+                c0 = self.core_base[p]
+                if c0 not in C:
+                    C.add(c0)
+                    work.append(c0)
+        self.stats._closed(len(C))
+        return C
+
+    def _probe_closure(self, core: int) -> List[Tuple[int, int, bool]]:
+        # LR(1) closure of [core, #] where # (bit n_terminals) is a dummy
+        # lookahead. Returns (core, spontaneous mask, propagates) for the
+        # cores with a symbol after the dot.
+        dummy = 1 << self.n_terminals
+        closed = self.closure_sets(((core, dummy),))
+        return [(c, mask & ~dummy, bool(mask & dummy)) for c, mask in closed.items() if self.core_next[c] >= 0]
+
+    def _build_lalr_collection(self) -> None:
+        rank = self.symbol_rank
+
+        # 1. LR(0) automaton over item cores
+        kernels: List[FrozenSet[int]] = []
+        kernel_map: Dict[FrozenSet[int], int] = {}
+        edges: List[Dict[int, int]] = []
+
+        def get_state_id(kernel: FrozenSet[int]) -> Tuple[int, bool]:
+            sid = kernel_map.get(kernel)
+            if sid is not None:
+                return sid, False
+            sid = len(kernels)
+            kernels.append(kernel)
+            kernel_map[kernel] = sid
+            edges.append({})
+            return sid, True
+
+        worklist: List[int] = [get_state_id(frozenset({self.core_base[0]}))[0]]
+        while worklist:
+            sid = worklist.pop()
+            groups: Dict[int, List[int]] = {}
+            for c in self._closure0(kernels[sid]):
+                X = self.core_next[c]
+                if X >= 0:
+                    groups.setdefault(X, []).append(c + 1)
+            for X in sorted(groups, key=rank.__getitem__):
+                jid, created = get_state_id(frozenset(groups[X]))
+                edges[sid][X] = jid
+                if created:
+                    worklist.append(jid)
+
+        # 2. Spontaneous lookaheads and propagation links per kernel item,
+        #    lookaheads as bitmasks
+        lookaheads: Dict[Tuple[int, int], int] = {}
+        propagate: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        for sid, kernel in enumerate(kernels):
+            for K in kernel:
+                lookaheads[(sid, K)] = 0
+        lookaheads[(0, self.core_base[0])] |= 1 << self.eof
+        probes: Dict[int, List[Tuple[int, int, bool]]] = {}
+        for sid, kernel in enumerate(kernels):
+            for K in kernel:
+                probe = probes.get(K)
+                if probe is None:
+                    probe = probes[K] = self._probe_closure(K)
+                links = propagate.setdefault((sid, K), [])
+                for c, spontaneous, propagates in probe:
+                    target = (edges[sid][self.core_next[c]], c + 1)
+                    if propagates:
+                        links.append(target)
+                    lookaheads[target] |= spontaneous
+
+        # 3. Propagate until nothing changes
+        work = [key for key, las in lookaheads.items() if las]
+        while work:
+            key = work.pop()
+            las = lookaheads[key]
+            for target in propagate.get(key, ()):
+                dst = lookaheads[target]
+                if dst | las != dst:
+                    lookaheads[target] = dst | las
+                    work.append(target)
+
+        # 4. LALR(1) states: LR(0) kernels with their lookaheads as LR(1) kernels
+        states: List[LR1State] = []
+        for sid, kernel in enumerate(kernels):
+            st = LR1State(tuple(sorted((K, lookaheads[(sid, K)]) for K in kernel)), sid, self)
+            st.complete = self._complete(self.closure_of(st.kernel))
+            states.append(st)
+            out: List[Tuple[str, int]] = []
+            for X in sorted(edges[sid], key=rank.__getitem__):
+                sym = self.symbols[X]
+                self.transitions[(sid, sym)] = edges[sid][X]
+                out.append((sym, edges[sid][X]))
+            self.adjacency.append(out)
+        self.states = states
+
+    def _reduced_production(self, action: Tuple[str, object]) -> Optional[Production]:
+        if action[0] == 'reduce':
+            return action[1]
+        if action[0] == 'accept':
+            return self.productions[0]
+        return None
+
+    def _label_merge_conflicts(self) -> None:
+        # Merging LR(1) states with the same core can only add reduce/reduce
+        # conflicts. Those whose two items never share the lookahead in a
+        # single canonical LR(1) state are reported as LALR merge conflicts,
+        # decided on the LALR automaton alone (see _shared_lookahead).
+        rr = [i for i, (_, _, prev, new) in enumerate(self.conflict_details)
+              if self._reduced_production(prev) and self._reduced_production(new)]
+        if not rr:
+            return
+        preds: List[List[int]] = [[] for _ in self.states]
+        for (sid, _), j in self.transitions.items():
+            preds[j].append(sid)
+        prod_index = {p: i for i, p in enumerate(self.productions)}
+        probes: Dict[int, Dict[int, int]] = {}
+        sources: Dict[int, Dict[int, Tuple[int, List[int]]]] = {}
+        for i in rr:
+            sid, a, prev, new = self.conflict_details[i]
+            x, y = (self.core_base[p] + len(self.prod_rhs[p])
+                    for p in (prod_index[self._reduced_production(prev)], prod_index[self._reduced_production(new)]))
+            if not self._shared_lookahead(sid, x, y, self.symbol_id[a], preds, probes, sources):
+                self.conflicts[i] = f"[LALR merge conflict] state {sid}, lookahead '{a}': existing {prev}, new {new}"
+
+    def _lookahead_sources(self, sid: int, probes: Dict[int, Dict[int, int]],
+                           sources: Dict[int, Dict[int, Tuple[int, List[int]]]]) -> Dict[int, Tuple[int, List[int]]]:
+        # Per item core in the closure of state sid: the lookaheads it gets
+        # spontaneously and the kernel cores whose lookaheads propagate to
+        # it. Both are the same in every LR(1) state with this LR(0) core.
+        out = sources.get(sid)
+        if out is not None:
+            return out
+        dummy = 1 << self.n_terminals
+        out = {}
+        for K, _ in self.states[sid].kernel:
+            probe = probes.get(K)
+            if probe is None:
+                probe = probes[K] = self.closure_sets(((K, dummy),))
+            for c, mask in probe.items():
+                spontaneous, links = out.get(c, (0, []))
+                out[c] = (spontaneous | (mask & ~dummy), links + [K] if mask & dummy else links)
+        sources[sid] = out
+        return out
+
+    def _shared_lookahead(self, sid: int, x: int, y: int, a: int, preds: List[List[int]],
+                          probes: Dict[int, Dict[int, int]],
+                          sources: Dict[int, Dict[int, Tuple[int, List[int]]]]) -> bool:
+        """Whether items x and y (cores in the closure of LALR state sid) have
+        lookahead a together in some state of the canonical LR(1) collection.
+
+        In an LR(1) state with this core, x gets a if a is spontaneous for x
+        or reaches one of its propagating kernel items. Kernel lookaheads
+        of that state are those of items K-1 in a predecessor LR(1) state,
+        so two different kernel items have a together iff items K1-1, K2-1
+        do in some predecessor: a backward search over the LALR automaton.
+        """
+        bit = 1 << a
+        seen: Set[Tuple[int, int, int]] = set()
+        goals: List[Tuple[int, int, int]] = [(sid, x, y)]
+        while goals:
+            t, x, y = goals.pop()
+            items = self._lookahead_sources(t, probes, sources)
+            merged = dict(self.states[t].kernel)
+            (sx, px), (sy, py) = items[x], items[y]
+            kx = {K for K in px if merged[K] & bit}
+            ky = {K for K in py if merged[K] & bit}
+            if not (sx & bit or kx) or not (sy & bit or ky):
+                continue  # one of them never has a here
+            if sx & bit or sy & bit or kx & ky:
+                # merged lookaheads are the union over LR(1) states, so the
+                # other item has a in at least one of them
+                return True
+            for K1 in kx:
+                for K2 in ky:
+                    key = (t, min(K1, K2), max(K1, K2))
+                    if key not in seen:
+                        seen.add(key)
+                        goals.extend((u, K1 - 1, K2 - 1) for u in preds[t])
+        return False
+
+    def outgoing(self, sid: int) -> List[Tuple[str, int]]:
+        # Outgoing transitions of a state, sorted by symbol
+        return self.adjacency[sid]
+
     # -------------------- tables --------------------
     def build_tables(self) -> None:
         if not self.states:
             self.build_canonical_collection()
 
-        terminals = set(self.grammar.terminals)
-        nonterminals = set(self.grammar.nonTerminals)
-        nonterminals.add(self.aug_start)
-
+        t0 = time.perf_counter()
+        T = self.n_terminals
         for state in self.states:
             sid = state.id
             # shifts
-            for (s, X), jid in self.transitions.items():
-                if s != sid:
-                    continue
-                if X in terminals:
+            for X, jid in self.outgoing(sid):
+                if self.symbol_id[X] < T:
                     self._set_action(sid, X, ("shift", jid))
-                elif X in nonterminals:
-                    if X != self.aug_start:
-                        self.GOTO[(sid, X)] = jid
+                elif X != self.aug_start:
+                    self.GOTO[(sid, X)] = jid
             # reduces/accept
-            for it in state.items:
-                if it.dot == len(it.rhs):
-                    if it.lhs == self.aug_start and it.la == '$':
+            for core, mask in state.complete:
+                p = self.core_prod[core]
+                for la in _bit_ids(mask):
+                    if p == 0 and la == self.eof:
                         self._set_action(sid, '$', ("accept", None))
                     else:
-                        prod = Production(it.lhs, it.rhs)
-                        self._set_action(sid, it.la, ("reduce", prod))
+                        self._set_action(sid, self.symbols[la], ("reduce", self.productions[p]))
+        if self.mode == 'lalr':
+            self._label_merge_conflicts()
+        self.stats.tables_seconds = time.perf_counter() - t0
+        self.stats.conflicts = len(self.conflicts)
+        self.build_stats = replace(self.stats)
+
+    def export_tables(self, path: str) -> None:
+        """Write ACTION/GOTO, productions and symbols to a compiled table file.
+
+        Load it back with `tablefile.load_tables`, which memory-maps the file
+        instead of rebuilding the canonical collection.
+        """
+        if __package__ is None or __package__ == "":
+            from tablefile import write_tables
+        else:
+            from .tablefile import write_tables
+        write_tables(self, path)
+
+    def export_parser(self, path: str) -> None:
+        """Write a standalone Python parser module for this grammar.
+
+        The module holds the tables as literals and its own driver loop; it
+        imports nothing from this package (see `codegen`).
+        """
+        if __package__ is None or __package__ == "":
+            from codegen import write_parser_module
+        else:
+            from .codegen import write_parser_module
+        write_parser_module(self, path)
 
     def _set_action(self, sid: int, a: str, action: Tuple[str, object]) -> None:
         key = (sid, a)
@@ -239,6 +783,7 @@ class LR1Builder:
             prev = self.ACTION[key]
             msg = f"[Conflict] state {sid}, lookahead '{a}': existing {prev}, new {action}"
             self.conflicts.append(msg)
+            self.conflict_details.append((sid, a, prev, action))
         else:
             self.ACTION[key] = action
 
@@ -247,8 +792,7 @@ class LR1Builder:
         for st in self.states:
             print(st.pretty())
             # outgoing transitions
-            outs = [(sym, self.transitions[(st.id, sym)]) for (sid, sym) in self.transitions if sid == st.id]
-            for sym, to in sorted(outs, key=lambda x: x[0]):
+            for sym, to in self.outgoing(st.id):
                 print(f"  on '{sym}' -> I{to}")
             print()
 
@@ -307,20 +851,19 @@ class LR1Builder:
         for st in self.states:
             # sorted lists for deterministic output
             closure_items = sorted(st.items, key=lambda x: (x.lhs, x.rhs, x.dot, x.la))
-            aug_start = getattr(self, 'aug_start', None)
-            kernel_items = [it for it in closure_items if it.dot > 0 or (aug_start is not None and it.lhs == aug_start)]
+            kernel_items = sorted(st.kernel_items, key=lambda x: (x.lhs, x.rhs, x.dot, x.la))
 
             kernel_text = ', '.join(str(it) for it in kernel_items)
             closure_text = ', '.join(str(it) for it in closure_items)
 
             # find outgoing transitions from this state
-            outs = [(sym, self.transitions[(st.id, sym)]) for (sid, sym) in self.transitions if sid == st.id]
+            outs = self.outgoing(st.id)
             if not outs:
                 # single row with empty Goto column
                 print("{:20} | {:40} | {:6} | {:60}".format('', kernel_text, st.id, closure_text))
             else:
                 # print one row per outgoing transition, repeating kernel/closure for readability
-                for i, (sym, to) in enumerate(sorted(outs, key=lambda x: x[0])):
+                for i, (sym, to) in enumerate(outs):
                     goto_text = f"goto({st.id}, {sym})"
                     print("{:20} | {:40} | {:6} | {:60}".format(goto_text, kernel_text, st.id, closure_text))
         print()
@@ -1,12 +1,18 @@
 from __future__ import annotations
-from typing import List, Tuple, Optional
-from dataclasses import dataclass
+from typing import Any, AsyncIterable, Callable, Dict, Iterable, List, Mapping, Tuple, Optional, Sequence, Union
+from dataclasses import dataclass, field
+from collections import deque
+import weakref
 
 # Dual-imports for script/module
 if __package__ is None or __package__ == "":
     from lr1 import LR1Builder, Production
+    from lexer import Lexer, LexError
+    from tablefile import CompiledTables, ACTION_ERROR
 else:
     from .lr1 import LR1Builder, Production
+    from .lexer import Lexer, LexError
+    from .tablefile import CompiledTables, ACTION_ERROR
 
 
 @dataclass
@@ -15,18 +21,669 @@ class ParseNode:
     children: List["ParseNode"]
 
 
-def _render_ascii(node: ParseNode, prefix: str = "", is_last: bool = True) -> List[str]:
-    lines: List[str] = []
-    if prefix == "":
-        lines.append(node.label)
-    else:
-        connector = "└── " if is_last else "├── "
-        lines.append(prefix + connector + node.label)
-    new_prefix = prefix + ("    " if is_last else "│   ")
-    for i, ch in enumerate(node.children):
-        last = (i == len(node.children) - 1)
-        lines.extend(_render_ascii(ch, new_prefix, last))
-    return lines
+class ParseTree:
+    """Flat parse tree stored as parallel arrays indexed by node id.
+
+    `label[i]` indexes `names`; `first[i]` is the first child of node i and
+    `next[i]` its next sibling (-1 for none). The LR parser creates nodes
+    bottom-up, so ids follow a postorder and the root is created last.
+    Rendering and serialization are iterative; `to_node` builds the nested
+    ParseNode view on demand.
+    """
+
+    __slots__ = ('names', '_ids', 'label', 'first', 'next', 'root')
+
+    def __init__(self) -> None:
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self.label: List[int] = []
+        self.first: List[int] = []
+        self.next: List[int] = []
+        self.root = -1
+
+    def __len__(self) -> int:
+        return len(self.label)
+
+    def _intern(self, name: str) -> int:
+        i = self._ids.get(name)
+        if i is None:
+            i = len(self.names)
+            self._ids[name] = i
+            self.names.append(name)
+        return i
+
+    def leaf(self, name: str) -> int:
+        i = len(self.label)
+        self.label.append(self._intern(name))
+        self.first.append(-1)
+        self.next.append(-1)
+        return i
+
+    def node(self, name: str, children: Sequence[int]) -> int:
+        # Link the children as siblings; the last one is reset explicitly
+        # because PushParser.restore can leave stale links behind
+        nxt = self.next
+        prev = -1
+        for c in children:
+            if prev >= 0:
+                nxt[prev] = c
+            prev = c
+        if prev >= 0:
+            nxt[prev] = -1
+        i = len(self.label)
+        self.label.append(self._intern(name))
+        self.first.append(children[0] if children else -1)
+        self.next.append(-1)
+        return i
+
+    def truncate(self, n: int) -> None:
+        del self.label[n:]
+        del self.first[n:]
+        del self.next[n:]
+
+    def name(self, i: int) -> str:
+        return self.names[self.label[i]]
+
+    def children(self, i: int) -> List[int]:
+        out: List[int] = []
+        c = self.first[i]
+        while c >= 0:
+            out.append(c)
+            c = self.next[c]
+        return out
+
+    @classmethod
+    def from_node(cls, root: ParseNode) -> "ParseTree":
+        # Postorder walk with an explicit stack; child ids collect on `ids`
+        tree = cls()
+        ids: List[int] = []
+        stack: List[Tuple[ParseNode, bool]] = [(root, False)]
+        while stack:
+            node, done = stack.pop()
+            if not node.children:
+                ids.append(tree.leaf(node.label))
+            elif done:
+                k = len(node.children)
+                i = tree.node(node.label, ids[-k:])
+                del ids[-k:]
+                ids.append(i)
+            else:
+                stack.append((node, True))
+                for ch in reversed(node.children):
+                    stack.append((ch, False))
+        tree.root = ids[-1]
+        return tree
+
+    def to_node(self, i: Optional[int] = None) -> ParseNode:
+        i = self.root if i is None else i
+        names, label, first, nxt = self.names, self.label, self.first, self.next
+        top = ParseNode(names[label[i]], [])
+        stack = [(i, top)]
+        while stack:
+            j, node = stack.pop()
+            c = first[j]
+            while c >= 0:
+                ch = ParseNode(names[label[c]], [])
+                node.children.append(ch)
+                stack.append((c, ch))
+                c = nxt[c]
+        return top
+
+    def to_json(self, i: Optional[int] = None) -> Dict[str, Any]:
+        i = self.root if i is None else i
+        names, label, first, nxt = self.names, self.label, self.first, self.next
+        top: Dict[str, Any] = {"label": names[label[i]], "children": []}
+        stack = [(i, top)]
+        while stack:
+            j, out = stack.pop()
+            c = first[j]
+            while c >= 0:
+                ch = {"label": names[label[c]], "children": []}
+                out["children"].append(ch)
+                stack.append((c, ch))
+                c = nxt[c]
+        return top
+
+    def ascii_lines(self, i: Optional[int] = None) -> List[str]:
+        i = self.root if i is None else i
+        names, label, first, nxt = self.names, self.label, self.first, self.next
+        lines: List[str] = [names[label[i]]]
+        # (node, prefix of its children); siblings are pushed in reverse
+        stack: List[Tuple[int, str]] = []
+
+        def push_children(j: int, prefix: str) -> None:
+            kids = []
+            c = first[j]
+            while c >= 0:
+                kids.append(c)
+                c = nxt[c]
+            for c in reversed(kids):
+                stack.append((c, prefix))
+
+        # The root counts as a last child: its children are indented too
+        push_children(i, "    ")
+        while stack:
+            j, prefix = stack.pop()
+            last = nxt[j] < 0
+            lines.append(prefix + ("└── " if last else "├── ") + names[label[j]])
+            push_children(j, prefix + ("    " if last else "│   "))
+        return lines
+
+    def render_ascii(self, i: Optional[int] = None) -> str:
+        return "\n".join(self.ascii_lines(i))
+
+
+@dataclass
+class ParseResult:
+    accepted: bool
+    # On error: index of the offending token in the input (len(tokens) for
+    # the implicit '$'), the token itself and the terminals that were valid there
+    error_pos: Optional[int] = None
+    error_token: Optional[str] = None
+    expected: List[str] = field(default_factory=list)
+    flat: Optional[ParseTree] = None
+    # Semantic value of the start symbol when parsed with `actions`
+    value: Any = None
+    # Character offset of the error in the source text (run_lexed only)
+    error_offset: Optional[int] = None
+
+    @property
+    def tree(self) -> Optional[ParseNode]:
+        # Nested view, built on demand from the flat tree
+        return self.flat.to_node() if self.flat is not None else None
+
+
+def _as_flat(node) -> ParseTree:
+    return node if isinstance(node, ParseTree) else ParseTree.from_node(node)
+
+
+def render_tree_ascii(node) -> Optional[str]:
+    # Accepts a ParseTree or a ParseNode
+    if node is None:
+        return None
+    return _as_flat(node).render_ascii()
+
+
+def tree_to_json(node) -> Optional[Dict[str, Any]]:
+    if node is None:
+        return None
+    return _as_flat(node).to_json()
+
+
+def error_to_json(result: ParseResult) -> Optional[Dict[str, Any]]:
+    if result.accepted:
+        return None
+    return {"position": result.error_pos, "token": result.error_token, "expected": result.expected,
+            "offset": result.error_offset}
+
+
+class _CompiledActionRow:
+    # action[s] of a CompiledTables, read from its mapped ACTION array.
+    # File cells are 0 error, 1 accept, v >= 2 shift to v-2, v < 0 reduce:
+    # v - 1 turns the positive ones into ParseTables' encoding.
+    __slots__ = ('cells', 'base', 'ids', 'names')
+
+    def __init__(self, tables: CompiledTables, s: int) -> None:
+        self.cells = tables._action
+        self.base = s * tables.n_terminals
+        self.ids = tables.terminal_ids
+        self.names = tables.terminals
+
+    def get(self, a: str, default=None):
+        col = self.ids.get(a)
+        if col is None:
+            return default
+        v = self.cells[self.base + col]
+        if v == ACTION_ERROR:
+            return default
+        return v - 1 if v > 0 else v
+
+    def __iter__(self):
+        cells, base = self.cells, self.base
+        return (a for col, a in enumerate(self.names) if cells[base + col] != ACTION_ERROR)
+
+
+class _CompiledGotoRow:
+    # goto[s] of a CompiledTables, read from its mapped GOTO array
+    __slots__ = ('cells', 'base', 'ids')
+
+    def __init__(self, tables: CompiledTables, s: int) -> None:
+        self.cells = tables._goto
+        self.base = s * tables.n_nonterminals
+        self.ids = tables.nonterminal_ids
+
+    def get(self, A: str, default=None):
+        col = self.ids.get(A)
+        if col is None:
+            return default
+        j = self.cells[self.base + col]
+        return default if j < 0 else j
+
+
+class ParseTables:
+    """ACTION/GOTO flattened into per-state dicts with integer actions.
+
+    action[s][a]: v > 0 shift to v-1, v < 0 reduce production -v-1, 0 accept.
+    goto[s][A]: target state. Built once per tables object (LR1Builder or
+    CompiledTables) and shared by every parser that uses it. For
+    CompiledTables the rows read the memory-mapped arrays instead, so
+    nothing is copied out of the file.
+    """
+
+    _cache: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    def __init__(self, lr1) -> None:
+        self.productions: List[Production] = list(lr1.productions)
+        self.prod_len: List[int] = [len(p.rhs) for p in self.productions]
+        self.prod_lhs: List[str] = [p.lhs for p in self.productions]
+        if isinstance(lr1, CompiledTables):
+            # One small view object per state; the cells stay in the file
+            self.action: Any = [_CompiledActionRow(lr1, s) for s in range(lr1.n_states)]
+            self.goto: Any = [_CompiledGotoRow(lr1, s) for s in range(lr1.n_states)]
+            return
+        prod_index = {p: i for i, p in enumerate(self.productions)}
+        action_items = list(lr1.ACTION.items())
+        goto_items = list(lr1.GOTO.items())
+        n = 1 + max([s for (s, _), _ in action_items] + [s for (s, _), _ in goto_items] + [0])
+        self.action = [{} for _ in range(n)]
+        self.goto = [{} for _ in range(n)]
+        for (s, a), act in action_items:
+            if act[0] == 'shift':
+                self.action[s][a] = act[1] + 1
+            elif act[0] == 'reduce':
+                self.action[s][a] = -prod_index[act[1]] - 1
+            elif act[0] == 'accept':
+                self.action[s][a] = 0
+        for (s, A), j in goto_items:
+            self.goto[s][A] = j
+
+    @classmethod
+    def of(cls, lr1) -> "ParseTables":
+        tables = cls._cache.get(lr1)
+        if tables is None:
+            tables = cls(lr1)
+            cls._cache[lr1] = tables
+        return tables
+
+
+# Reduce callback: gets the right-hand side values ($1..$n) and returns $$
+SemanticAction = Callable[..., Any]
+ActionKey = Union[int, str, Production]
+
+
+def bind_actions(tables: ParseTables, actions: Mapping[ActionKey, SemanticAction]) -> List[Optional[SemanticAction]]:
+    """Resolve `actions` to a list indexed by production number.
+
+    Keys may be the production index, the Production itself or its text
+    ("E -> E + T"). Productions without an action get None, which the
+    parser treats as the yacc default $$ = $1 (None for empty productions).
+    """
+    prods = tables.productions
+    by_text = {str(p): i for i, p in enumerate(prods)}
+    by_prod = {p: i for i, p in enumerate(prods)}
+    out: List[Optional[SemanticAction]] = [None] * len(prods)
+    for key, fn in actions.items():
+        if isinstance(key, int):
+            i = key if 0 <= key < len(prods) else None
+        elif isinstance(key, str):
+            i = by_text.get(' '.join(key.split()))
+        else:
+            i = by_prod.get(key)
+        if i is None:
+            raise ValueError(f"Producción desconocida en las acciones semánticas: {key}")
+        out[i] = fn
+    return out
+
+
+class _Rest:
+    # Remaining input as a view on the token list; avoids an O(n) slice per step
+    __slots__ = ('tokens', 'pos')
+
+    def __init__(self, tokens: List[str], pos: int) -> None:
+        self.tokens = tokens
+        self.pos = pos
+
+    def __len__(self) -> int:
+        return len(self.tokens) - self.pos
+
+    def __getitem__(self, i: int) -> str:
+        return self.tokens[self.pos + i]
+
+    def __iter__(self):
+        return iter(self.tokens[self.pos:])
+
+
+class ParseObserver:
+    """Step hooks for LRParser.run. Stacks are passed live; copy if kept.
+
+    `rest` is the remaining input including the final '$', as a read-only
+    sequence view.
+    """
+
+    def start(self, tokens: List[str]) -> None:
+        pass
+
+    def shift(self, states: List[int], symbols: List[str], rest: List[str], to: int) -> None:
+        pass
+
+    def reduce(self, states: List[int], symbols: List[str], rest: List[str], prod: Production) -> None:
+        pass
+
+    def goto(self, states: List[int], symbols: List[str], rest: List[str], to: int, lhs: str) -> None:
+        pass
+
+    def accept(self, states: List[int], symbols: List[str], rest: List[str]) -> None:
+        pass
+
+    def error(self, states: List[int], symbols: List[str], rest: List[str], message: str) -> None:
+        pass
+
+
+def _stack_display(states: List[int], symbols: List[str]) -> str:
+    # Combine states and symbols for readability: (s0) X (s1) Y ...
+    parts: List[str] = [f"({states[0]})"]
+    for i, sym in enumerate(symbols):
+        parts.append(sym)
+        parts.append(f"({states[i+1]})")
+    return ' '.join(parts)
+
+
+class ConsoleTracer(ParseObserver):
+    # Prints the classic three-column trace table
+    widthPila = 30
+    widthEntrada = 30
+    widthAccion = 25
+
+    def _row(self, states: List[int], symbols: List[str], rest: List[str], action: str) -> None:
+        pila = _stack_display(states, symbols)
+        entrada = ' '.join(rest)
+        print(f"{pila:<{self.widthPila}}{entrada:<{self.widthEntrada}}{action:<{self.widthAccion}}")
+
+    def start(self, tokens: List[str]) -> None:
+        print("\n=== Trazas LR(1) ===")
+        print(f"{'Estados|Símbolos':<{self.widthPila}}{'Entrada':<{self.widthEntrada}}{'Acción':<{self.widthAccion}}")
+        print('-' * (self.widthPila + self.widthEntrada + self.widthAccion))
+
+    def shift(self, states, symbols, rest, to) -> None:
+        self._row(states, symbols, rest, 'shift ' + str(to))
+
+    def reduce(self, states, symbols, rest, prod) -> None:
+        self._row(states, symbols, rest, 'reduce ' + str(prod))
+
+    def goto(self, states, symbols, rest, to, lhs) -> None:
+        # Extra row showing the GOTO destination state as a standalone action
+        self._row(states, symbols, rest, str(to))
+
+    def accept(self, states, symbols, rest) -> None:
+        self._row(states, symbols, rest, 'accept')
+
+    def error(self, states, symbols, rest, message) -> None:
+        if rest:
+            self._row(states, symbols, rest, 'error')
+        print(f"[LR(1)] {message}")
+
+
+class TraceCollector(ParseObserver):
+    # JSON-friendly structured trace for frontend tables
+    def __init__(self) -> None:
+        self.steps: List[dict] = []
+
+    def _step(self, states, symbols, rest, action: dict) -> None:
+        self.steps.append({
+            "stackStates": list(states),
+            "stackSymbols": list(symbols),
+            "stackDisplay": _stack_display(states, symbols),
+            "input": ' '.join(rest),
+            "action": action,
+        })
+
+    def shift(self, states, symbols, rest, to) -> None:
+        self._step(states, symbols, rest, {"type": "shift", "to": to, "symbol": rest[0]})
+
+    def reduce(self, states, symbols, rest, prod) -> None:
+        self._step(states, symbols, rest, {
+            "type": "reduce",
+            "production": {"lhs": prod.lhs, "rhs": list(prod.rhs), "text": str(prod)}
+        })
+
+    def goto(self, states, symbols, rest, to, lhs) -> None:
+        self._step(states, symbols, rest, {"type": "goto", "to": to, "on": lhs})
+
+    def accept(self, states, symbols, rest) -> None:
+        self._step(states, symbols, rest, {"type": "accept"})
+
+    def error(self, states, symbols, rest, message) -> None:
+        if rest:
+            self._step(states, symbols, rest, {"type": "error", "state": states[-1], "lookahead": rest[0]})
+
+
+class CompactTrace(ParseObserver):
+    """Memory-bounded trace: one small record per step, no stack copies.
+
+    Each step keeps its action, the input position and the stack delta from
+    the previous step (entries popped, entry pushed). Full stacks are rebuilt
+    on demand by replaying deltas from `base`, the stack before the oldest
+    kept step. With `limit`, recording stops after that many steps
+    (`truncated`); with `ring=True` the last `limit` steps are kept instead.
+    """
+
+    def __init__(self, limit: Optional[int] = None, ring: bool = False) -> None:
+        self.limit = limit
+        self.ring = ring
+        self.tokens: List[str] = []
+        self.records: deque = deque()  # (action, pos, pop, push)
+        self.base_states: List[int] = [0]
+        self.base_symbols: List[str] = []
+        self.total = 0
+        self.dropped = 0
+        self.truncated = False
+        # Stack change the parser applies after the current step
+        self._pop = 0
+        self._push = 0
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def start(self, tokens: List[str]) -> None:
+        self.tokens = tokens
+
+    def _step(self, states, symbols, rest, action: dict) -> None:
+        pop, push = self._pop, self._push
+        self._pop = self._push = 0
+        self.total += 1
+        if self.truncated:
+            return
+        entry = (symbols[-1], states[-1]) if push else None
+        records = self.records
+        if self.limit is not None and len(records) >= self.limit:
+            if not self.ring or self.limit <= 0:
+                self.truncated = True
+                return
+            self._apply(self.base_states, self.base_symbols, records.popleft())
+            self.dropped += 1
+        records.append((action, len(self.tokens) - len(rest), pop, entry))
+
+    @staticmethod
+    def _apply(states: List[int], symbols: List[str], record) -> None:
+        _, _, pop, entry = record
+        if pop:
+            del states[-pop:]
+            del symbols[-pop:]
+        if entry is not None:
+            symbols.append(entry[0])
+            states.append(entry[1])
+
+    def shift(self, states, symbols, rest, to) -> None:
+        self._step(states, symbols, rest, {"type": "shift", "to": to, "symbol": rest[0]})
+        self._push = 1
+
+    def reduce(self, states, symbols, rest, prod) -> None:
+        self._step(states, symbols, rest, {
+            "type": "reduce",
+            "production": {"lhs": prod.lhs, "rhs": list(prod.rhs), "text": str(prod)}
+        })
+        self._pop, self._push = len(prod.rhs), 1
+
+    def goto(self, states, symbols, rest, to, lhs) -> None:
+        self._step(states, symbols, rest, {"type": "goto", "to": to, "on": lhs})
+
+    def accept(self, states, symbols, rest) -> None:
+        self._step(states, symbols, rest, {"type": "accept"})
+
+    def error(self, states, symbols, rest, message) -> None:
+        if rest:
+            self._step(states, symbols, rest, {"type": "error", "state": states[-1], "lookahead": rest[0]})
+
+    def stack_at(self, i: int) -> Tuple[List[int], List[str]]:
+        """Stacks (states, symbols) as seen by kept step `i`."""
+        states, symbols = list(self.base_states), list(self.base_symbols)
+        for k in range(i + 1):
+            self._apply(states, symbols, self.records[k])
+        return states, symbols
+
+    def verbose(self) -> List[dict]:
+        # Expand to the TraceCollector shape; one replay, O(output size)
+        out: List[dict] = []
+        states, symbols = list(self.base_states), list(self.base_symbols)
+        for record in self.records:
+            self._apply(states, symbols, record)
+            out.append({
+                "stackStates": list(states),
+                "stackSymbols": list(symbols),
+                "stackDisplay": _stack_display(states, symbols),
+                "input": ' '.join(self.tokens[record[1]:]),
+                "action": record[0],
+            })
+        return out
+
+    def to_json(self) -> dict:
+        return {
+            "format": "compact",
+            "tokens": list(self.tokens),
+            "base": {"states": list(self.base_states), "symbols": list(self.base_symbols)},
+            "total": self.total,
+            "dropped": self.dropped,
+            "truncated": self.truncated,
+            "steps": [
+                {"action": action, "pos": pos, "pop": pop, "push": list(entry) if entry else None}
+                for action, pos, pop, entry in self.records
+            ],
+        }
+
+
+class PushParser:
+    """Incremental LR parser: the caller pushes tokens and then calls finish().
+
+    The stack is a persistent linked list of (state, node, below) cells, so
+    checkpoint()/restore() are O(1) and memory is bounded by the stack depth,
+    not by the length of the input. Errors are reported by the feed that
+    causes them. With build_tree, `node` is an id in the flat `tree`, which
+    restore() truncates back to its size at the checkpoint.
+    """
+
+    def __init__(self, tables: ParseTables, build_tree: bool = False) -> None:
+        self.tables = tables
+        self.build_tree = build_tree
+        self.tree: Optional[ParseTree] = ParseTree() if build_tree else None
+        self._top: Tuple[int, int, Optional[tuple]] = (0, -1, None)
+        self.pos = 0  # tokens shifted so far
+        self.result: Optional[ParseResult] = None
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def _advance(self, a: str) -> bool:
+        # Reduce until `a` is shifted (True) or the parse ends (False)
+        t = self.tables
+        tree = self.tree
+        top = self._top
+        while True:
+            s = top[0]
+            v = t.action[s].get(a)
+            if v is None:
+                self._top = top
+                self.result = ParseResult(False, self.pos, a, sorted(t.action[s]))
+                return False
+            if v > 0:
+                self._top = (v - 1, tree.leaf(a) if tree is not None else -1, top)
+                return True
+            if v < 0:
+                p = -v - 1
+                lhs = t.prod_lhs[p]
+                children: List[int] = []
+                for _ in range(t.prod_len[p]):
+                    children.append(top[1])
+                    top = top[2]
+                node = -1
+                if tree is not None:
+                    children.reverse()
+                    node = tree.node(lhs, children)
+                j = t.goto[top[0]].get(lhs)
+                if j is None:
+                    self._top = top
+                    self.result = ParseResult(False, self.pos, a, sorted(t.action[s]))
+                    return False
+                top = (j, node, top)
+            else:
+                self._top = top
+                if tree is not None:
+                    tree.root = top[1]
+                    tree.next[tree.root] = -1
+                self.result = ParseResult(True, flat=tree)
+                return False
+
+    def feed(self, token: str) -> bool:
+        """Push one token. False once the parse has failed (see `result`)."""
+        if self.result is not None:
+            return False
+        if token == '$':
+            return self.finish().accepted
+        if self._advance(token):
+            self.pos += 1
+            return True
+        return False
+
+    def feed_many(self, tokens: Iterable[str]) -> bool:
+        for tok in tokens:
+            if not self.feed(tok):
+                return False
+        return True
+
+    async def feed_async(self, stream: AsyncIterable[str]) -> ParseResult:
+        # Consume an async token stream, stopping at the first error
+        async for tok in stream:
+            if not self.feed(tok):
+                break
+        return self.finish()
+
+    def finish(self) -> ParseResult:
+        """Signal end of input and return the final result."""
+        if self.result is None and self._advance('$'):
+            # '$' shifted: only possible with a grammar that uses it as a symbol
+            self.result = ParseResult(False, self.pos, '$', [])
+        return self.result
+
+    def expected(self) -> List[str]:
+        # Terminals acceptable in the current configuration
+        return sorted(self.tables.action[self._top[0]])
+
+    def states(self) -> List[int]:
+        out: List[int] = []
+        cell = self._top
+        while cell is not None:
+            out.append(cell[0])
+            cell = cell[2]
+        out.reverse()
+        return out
+
+    def checkpoint(self) -> tuple:
+        return (self._top, self.pos, self.result, len(self.tree) if self.tree is not None else 0)
+
+    def restore(self, cp: tuple) -> None:
+        self._top, self.pos, self.result, size = cp
+        if self.tree is not None:
+            self.tree.truncate(size)
 
 
 class LRParser:
@@ -36,176 +693,231 @@ class LRParser:
         # Structured trace captured when collect_trace=True in parse()
         # Each step is a dict with keys: stackStates, stackSymbols, stackDisplay, input, action
         self.last_trace: Optional[List[dict]] = None
+        self._tables: Optional[ParseTables] = None
 
-    def parse(self, tokens: List[str], collect_trace: bool = False) -> bool:
-        # Ensure tables built
-        if not self.lr1.states:
-            self.lr1.build_canonical_collection()
-            self.lr1.build_tables()
+    @property
+    def tables(self) -> ParseTables:
+        if self._tables is None:
+            # Ensure tables built. Precompiled tables always are; testing their
+            # ACTION view for emptiness would scan the whole mapped array.
+            if not isinstance(self.lr1, CompiledTables) and not self.lr1.ACTION:
+                if not self.lr1.states:
+                    self.lr1.build_canonical_collection()
+                self.lr1.build_tables()
+            self._tables = ParseTables.of(self.lr1)
+        return self._tables
+
+    def push(self, build_tree: bool = False) -> PushParser:
+        """Start an incremental parse; tokens are fed one at a time."""
+        return PushParser(self.tables, build_tree)
+
+    def run_text(self, text: str, build_tree: bool = False,
+                 observers: Sequence[ParseObserver] = ()) -> ParseResult:
+        """Tokenize `text` with the grammar's lexer (whitespace split if it
+        defines none) and run(). Lexer errors come back as a failed result."""
+        lexer = Lexer.of(self.lr1)
+        if lexer is None:
+            return self.run(text.split(), build_tree, observers)
+        lexed = []
+        try:
+            for tok in lexer.tokens(text):
+                lexed.append(tok)
+        except LexError as e:
+            return ParseResult(False, len(lexed), text[e.pos], [], error_offset=e.pos)
+        result = self.run([tok.type for tok in lexed], build_tree, observers)
+        if not result.accepted:
+            i = result.error_pos
+            result.error_offset = lexed[i].pos if i < len(lexed) else len(text)
+        return result
+
+    def run_lexed(self, tokens: Iterable[Any], build_tree: bool = False) -> ParseResult:
+        """Parse a lazy token stream such as lexer.Lexer.tokens(text).
+
+        Tokens need `type`, `pos` and `end`; they are consumed one at a time
+        and never collected into a list. Lexer errors propagate to the caller.
+        """
+        pp = PushParser(self.tables, build_tree)
+        offset = 0
+        for tok in tokens:
+            if not pp.feed(tok.type):
+                offset = tok.pos
+                break
+            offset = tok.end
+        result = pp.finish()
+        if not result.accepted:
+            result.error_offset = offset
+        return result
+
+    def run(self, tokens: List[str], build_tree: bool = False,
+            observers: Sequence[ParseObserver] = (),
+            actions: Optional[Mapping[ActionKey, SemanticAction]] = None) -> ParseResult:
+        """Parse without printing. Trees and per-step hooks are opt-in.
+
+        With `actions` (see bind_actions) the parser keeps only a value stack:
+        terminals push their token, each reduce calls the production's action
+        with the right-hand side values, and `value` of the result is the
+        value of the start symbol. No tree is built in this mode.
+        """
+        if actions is not None:
+            if build_tree or observers:
+                raise ValueError("actions no se combina con build_tree ni con observers")
+            return self._run_semantic(tokens, actions)
+        if build_tree or observers:
+            return self._run_observed(tokens, build_tree, observers)
+
+        t = self.tables
+        action, goto, prod_len, prod_lhs = t.action, t.goto, t.prod_len, t.prod_lhs
+        n = len(tokens)
+        stack: List[int] = [0]
+        ip = 0
+        a = tokens[0] if n else '$'
+        while True:
+            s = stack[-1]
+            v = action[s].get(a)
+            if v is None:
+                return ParseResult(False, ip, a, sorted(action[s]))
+            if v > 0:
+                stack.append(v - 1)
+                ip += 1
+                a = tokens[ip] if ip < n else '$'
+            elif v < 0:
+                p = -v - 1
+                k = prod_len[p]
+                if k:
+                    del stack[-k:]
+                j = goto[stack[-1]].get(prod_lhs[p])
+                if j is None:
+                    return ParseResult(False, ip, a, sorted(action[s]))
+                stack.append(j)
+            else:
+                return ParseResult(True)
+
+    def _run_semantic(self, tokens: List[str], actions: Mapping[ActionKey, SemanticAction]) -> ParseResult:
+        t = self.tables
+        action, goto, prod_len, prod_lhs = t.action, t.goto, t.prod_len, t.prod_lhs
+        fns = bind_actions(t, actions)
+        n = len(tokens)
+        stack: List[int] = [0]
+        values: List[Any] = []
+        ip = 0
+        a = tokens[0] if n else '$'
+        while True:
+            s = stack[-1]
+            v = action[s].get(a)
+            if v is None:
+                return ParseResult(False, ip, a, sorted(action[s]))
+            if v > 0:
+                stack.append(v - 1)
+                values.append(a)
+                ip += 1
+                a = tokens[ip] if ip < n else '$'
+            elif v < 0:
+                p = -v - 1
+                k = prod_len[p]
+                if k:
+                    args = values[-k:]
+                    del values[-k:]
+                    del stack[-k:]
+                else:
+                    args = []
+                fn = fns[p]
+                values.append(fn(*args) if fn is not None else (args[0] if args else None))
+                j = goto[stack[-1]].get(prod_lhs[p])
+                if j is None:
+                    return ParseResult(False, ip, a, sorted(action[s]))
+                stack.append(j)
+            else:
+                return ParseResult(True, value=values[-1] if values else None)
 
+    def _run_observed(self, tokens: List[str], build_tree: bool,
+                      observers: Sequence[ParseObserver]) -> ParseResult:
+        t = self.tables
         # Append end marker
         if not tokens or tokens[-1] != '$':
             tokens = tokens + ['$']
+        for ob in observers:
+            ob.start(tokens)
 
-        # Stacks: states and symbols (for trace)
         state_stack: List[int] = [0]
         symbol_stack: List[str] = []
-
+        # Node ids in the flat tree, aligned with grammar symbols (ignore '$')
+        tree = ParseTree() if build_tree else None
+        node_stack: List[int] = []
         ip = 0
-        # stack for parse tree nodes aligned with grammar symbols (ignore '$')
-        node_stack: List[ParseNode] = []
-        widthPila = 30
-        widthEntrada = 30
-        widthAccion = 25
-        # Human-readable row trace (still printed)
-        trace_rows: List[Tuple[str, str, str]] = []
-        # JSON-friendly structured trace for frontend tables
-        json_trace: List[dict] = []
-        print("\n=== Trazas LR(1) ===")
-        print(f"{'Estados|Símbolos':<{widthPila}}{'Entrada':<{widthEntrada}}{'Acción':<{widthAccion}}")
-        print('-' * (widthPila + widthEntrada + widthAccion))
-
-        def pila_str() -> str:
-            # Combine states and symbols for readability: (s0) X (s1) Y ...
-            parts: List[str] = []
-            parts.append(f"({state_stack[0]})")
-            for i, sym in enumerate(symbol_stack):
-                parts.append(sym)
-                parts.append(f"({state_stack[i+1]})")
-            return ' '.join(parts)
-
         while True:
             s = state_stack[-1]
             a = tokens[ip]
-            act = self.lr1.ACTION.get((s, a))
-            entrada_rest = ' '.join(tokens[ip:])
-
-            if act is None:
-                row = (pila_str(), entrada_rest, 'error')
-                trace_rows.append(row)
-                print(f"{row[0]:<{widthPila}}{row[1]:<{widthEntrada}}{row[2]:<{widthAccion}}")
-                if collect_trace:
-                    json_trace.append({
-                        "stackStates": list(state_stack),
-                        "stackSymbols": list(symbol_stack),
-                        "stackDisplay": row[0],
-                        "input": entrada_rest,
-                        "action": {"type": "error", "state": s, "lookahead": a},
-                    })
-                print(f"[LR(1)] Error en estado {s} con lookahead '{a}'")
-                self.last_trace = json_trace if collect_trace else None
-                return False
-
-            if act[0] == 'shift':
-                t = act[1]
-                row = (pila_str(), entrada_rest, 'shift ' + str(t))
-                trace_rows.append(row)
-                print(f"{row[0]:<{widthPila}}{row[1]:<{widthEntrada}}{row[2]:<{widthAccion}}")
-                if collect_trace:
-                    json_trace.append({
-                        "stackStates": list(state_stack),
-                        "stackSymbols": list(symbol_stack),
-                        "stackDisplay": row[0],
-                        "input": entrada_rest,
-                        "action": {"type": "shift", "to": t, "symbol": a},
-                    })
+            v = t.action[s].get(a)
+            rest = _Rest(tokens, ip)
+            if v is None:
+                for ob in observers:
+                    ob.error(state_stack, symbol_stack, rest, f"Error en estado {s} con lookahead '{a}'")
+                return ParseResult(False, ip, a, sorted(t.action[s]))
+            if v > 0:
+                for ob in observers:
+                    ob.shift(state_stack, symbol_stack, rest, v - 1)
                 symbol_stack.append(a)
-                state_stack.append(t)
+                state_stack.append(v - 1)
                 ip += 1
-                if a != '$':
-                    node_stack.append(ParseNode(a, []))
-            elif act[0] == 'reduce':
-                prod: Production = act[1]
-                beta = list(prod.rhs)
-                row = (pila_str(), entrada_rest, 'reduce ' + str(prod))
-                trace_rows.append(row)
-                print(f"{row[0]:<{widthPila}}{row[1]:<{widthEntrada}}{row[2]:<{widthAccion}}")
-                if collect_trace:
-                    json_trace.append({
-                        "stackStates": list(state_stack),
-                        "stackSymbols": list(symbol_stack),
-                        "stackDisplay": row[0],
-                        "input": entrada_rest,
-                        "action": {
-                            "type": "reduce",
-                            "production": {"lhs": prod.lhs, "rhs": list(prod.rhs), "text": str(prod)}
-                        },
-                    })
-                # Pop |beta| symbols/states
-                for _ in beta:
-                    if not symbol_stack:
-                        print('[LR(1)] Pila inconsistente durante reduce')
-                        self.last_trace = json_trace if collect_trace else None
-                        return False
-                    symbol_stack.pop()
-                    state_stack.pop()
-                # Build parse tree node: pop |beta| nodes from node_stack
-                children: List[ParseNode] = []
-                for _ in beta:
-                    # Only pop when beta had a symbol (term or nonterm). For epsilon, len(beta)==0
-                    if node_stack:
-                        children.append(node_stack.pop())
-                children.reverse()
-                node_stack.append(ParseNode(prod.lhs, children))
+                if tree is not None and a != '$':
+                    node_stack.append(tree.leaf(a))
+            elif v < 0:
+                prod = t.productions[-v - 1]
+                for ob in observers:
+                    ob.reduce(state_stack, symbol_stack, rest, prod)
+                k = len(prod.rhs)
+                if k > len(symbol_stack):
+                    for ob in observers:
+                        ob.error(state_stack, symbol_stack, [], 'Pila inconsistente durante reduce')
+                    return ParseResult(False, ip, a, sorted(t.action[s]))
+                if k:
+                    del symbol_stack[-k:]
+                    del state_stack[-k:]
+                if tree is not None:
+                    # Build parse tree node from the last |beta| nodes
+                    children = node_stack[-k:] if k else []
+                    if k:
+                        del node_stack[-k:]
+                    node_stack.append(tree.node(prod.lhs, children))
                 # GOTO on lhs
                 s = state_stack[-1]
-                j = self.lr1.GOTO.get((s, prod.lhs))
+                j = t.goto[s].get(prod.lhs)
                 if j is None:
-                    print(f"[LR(1)] GOTO indefinido para estado {s} con {prod.lhs}")
-                    self.last_trace = json_trace if collect_trace else None
-                    return False
+                    for ob in observers:
+                        ob.error(state_stack, symbol_stack, [], f"GOTO indefinido para estado {s} con {prod.lhs}")
+                    return ParseResult(False, ip, a, sorted(t.action[s]))
                 symbol_stack.append(prod.lhs)
                 state_stack.append(j)
-                # Extra trace row to show the GOTO destination state as a standalone action
-                # (keeps the same input view; stack already reflects the goto)
-                row2 = (pila_str(), entrada_rest, str(j))
-                trace_rows.append(row2)
-                print(f"{row2[0]:<{widthPila}}{row2[1]:<{widthEntrada}}{row2[2]:<{widthAccion}}")
-                if collect_trace:
-                    json_trace.append({
-                        "stackStates": list(state_stack),
-                        "stackSymbols": list(symbol_stack),
-                        "stackDisplay": row2[0],
-                        "input": entrada_rest,
-                        "action": {"type": "goto", "to": j, "on": prod.lhs},
-                    })
-            elif act[0] == 'accept':
-                row = (pila_str(), entrada_rest, 'accept')
-                trace_rows.append(row)
-                print(f"{row[0]:<{widthPila}}{row[1]:<{widthEntrada}}{row[2]:<{widthAccion}}")
-                if collect_trace:
-                    json_trace.append({
-                        "stackStates": list(state_stack),
-                        "stackSymbols": list(symbol_stack),
-                        "stackDisplay": row[0],
-                        "input": entrada_rest,
-                        "action": {"type": "accept"},
-                    })
-                # The remaining node on node_stack should be the parse tree root
-                root: Optional[ParseNode] = node_stack[-1] if node_stack else None
-                self.last_tree = root
-                self.last_trace = json_trace if collect_trace else None
-                if root is not None and not collect_trace:
-                    # In API mode (collect_trace=True) skip console tree printing.
-                    # When printing on Windows consoles, fall back silently if Unicode can't be encoded.
-                    try:
-                        print("\nÁrbol de derivación (LR):")
-                        for line in _render_ascii(root):
-                            print(line)
-                    except UnicodeEncodeError:
-                        pass
-                print("\n[LR(1)] Cadena aceptada")
-                return True
+                for ob in observers:
+                    ob.goto(state_stack, symbol_stack, rest, j, prod.lhs)
             else:
-                print(f"{pila_str():<{widthPila}}{entrada_rest:<{widthEntrada}}{'error':<{widthAccion}}")
-                print(f"[LR(1)] Acción desconocida {act}")
-                if collect_trace:
-                    json_trace.append({
-                        "stackStates": list(state_stack),
-                        "stackSymbols": list(symbol_stack),
-                        "stackDisplay": pila_str(),
-                        "input": entrada_rest,
-                        "action": {"type": "error", "detail": str(act)},
-                    })
-                self.last_trace = json_trace if collect_trace else None
-                return False
+                for ob in observers:
+                    ob.accept(state_stack, symbol_stack, rest)
+                # The remaining node on node_stack should be the parse tree root
+                if tree is None or not node_stack:
+                    return ParseResult(True)
+                tree.root = node_stack[-1]
+                return ParseResult(True, flat=tree)
+
+    def parse(self, tokens: List[str], collect_trace: bool = False) -> bool:
+        # Console mode: prints the trace table and, on accept, the tree
+        collector = TraceCollector() if collect_trace else None
+        observers: List[ParseObserver] = [ConsoleTracer()]
+        if collector is not None:
+            observers.append(collector)
+        result = self.run(tokens, build_tree=True, observers=observers)
+        self.last_trace = collector.steps if collector is not None else None
+        if not result.accepted:
+            return False
+        self.last_tree = result.tree
+        if result.flat is not None and not collect_trace:
+            # In API mode (collect_trace=True) skip console tree printing.
+            # When printing on Windows consoles, fall back silently if Unicode can't be encoded.
+            try:
+                print("\nÁrbol de derivación (LR):")
+                for line in result.flat.ascii_lines():
+                    print(line)
+            except UnicodeEncodeError:
+                pass
+        print("\n[LR(1)] Cadena aceptada")
+        return True
@@ -1,20 +1,74 @@
 from __future__ import annotations
 from pathlib import Path
-import sys
+import argparse
 if __package__ is None or __package__ == "":
     from grammar import Grammar
-    from lr1 import LR1Builder
+    from lr1 import LR1Builder, MODES
     from lr_parser import LRParser
+    from lexer import Lexer, LexError
+    from tablefile import load_tables
+    from first import First
+    from follow import Follow
+    from table import Table
+    from parser import Parser
 else:
     from .grammar import Grammar
-    from .lr1 import LR1Builder
+    from .lr1 import LR1Builder, MODES
     from .lr_parser import LRParser
+    from .lexer import Lexer, LexError
+    from .tablefile import load_tables
+    from .first import First
+    from .follow import Follow
+    from .table import Table
+    from .parser import Parser
+
+
+def tokenize(lr1, entrada: str):
+    # %token rules of the grammar if it has them, whitespace otherwise
+    lexer = Lexer.of(lr1)
+    if lexer is None:
+        return entrada.split()
+    try:
+        return lexer.types(entrada)
+    except LexError as e:
+        print(f"[Lexer] {e}")
+        return None
 
 
 def main() -> None:
     base = Path(__file__).parent
     grammar_path = base / 'gramatica.txt'
 
+    ap = argparse.ArgumentParser(description="Parser LR(1) de ejemplo")
+    ap.add_argument('--mode', choices=MODES, default='lr1', help="lr1 (canónico) o lalr")
+    ap.add_argument('--tables', help="usar tablas precompiladas en lugar de construir el autómata")
+    ap.add_argument('--save-tables', help="guardar las tablas construidas en este archivo")
+    ap.add_argument('--workers', type=int, default=1, help="procesos para construir la colección canónica LR(1)")
+    ap.add_argument('--emit-parser', help="generar un módulo Python autónomo con el parser de esta gramática")
+    ap.add_argument('--ll1', action='store_true', help="parsear también la entrada con el parser predictivo LL(1)")
+    ap.add_argument('entrada', nargs='*', help="tokens de entrada separados por espacios")
+    args = ap.parse_args()
+
+    # Entrada como cadena completa (tokens separados por espacios).
+    # Ejemplos válidos: "c d d $" o "1 + 3 $". El parser añadirá '$' si falta.
+    if args.entrada:
+        entrada_str = ' '.join(args.entrada)
+    else:
+        # Fallback por defecto para ejecución sin argumentos
+        entrada_str = "c d d $"
+
+    if args.tables:
+        # Arranque rápido: las tablas se mapean desde disco, sin colección canónica
+        tables = load_tables(args.tables)
+        tables.print_tables()
+        entrada_tokens = tokenize(tables, entrada_str)
+        if entrada_tokens is None:
+            return
+        print("\n=== Parseando entrada (LR1) ===")
+        print(f"Entrada: {entrada_tokens}")
+        _ = LRParser(tables).parse(entrada_tokens)
+        return
+
     gramatica = Grammar()
     if not gramatica.load_from_file(str(grammar_path)):
         print('Error al cargar la gramática.')
@@ -23,33 +77,52 @@ def main() -> None:
     print("=== Gramática cargada ===")
     gramatica.print()
 
-    # Construcción LR(1)
-    lr1 = LR1Builder(gramatica)
-    lr1.build_canonical_collection()
-    print("\n=== Estados LR(1) ===")
+    # Construcción LR(1) / LALR(1)
+    etiqueta = 'LALR(1)' if args.mode == 'lalr' else 'LR(1)'
+    lr1 = LR1Builder(gramatica, mode=args.mode)
+    lr1.build_canonical_collection(workers=args.workers)
+    print(f"\n=== Estados {etiqueta} ===")
     lr1.print_states()
     # Also print the closure table (kernel & closure per state) for console output
     lr1.print_closure_table()
     lr1.build_tables()
-    print("\n=== Tablas LR(1) ===")
+    print(f"\n=== Tablas {etiqueta} ===")
     lr1.print_tables()
+    if args.save_tables:
+        lr1.export_tables(args.save_tables)
+        print(f"Tablas guardadas en {args.save_tables}")
+    if args.emit_parser:
+        lr1.export_parser(args.emit_parser)
+        print(f"Parser generado en {args.emit_parser}")
 
     # Parser LR(1)
     parser = LRParser(lr1)
 
-    # Entrada como cadena completa (tokens separados por espacios).
-    # Ejemplos válidos: "c d d $" o "1 + 3 $". El parser añadirá '$' si falta.
-    if len(sys.argv) > 1:
-        entrada_str = ' '.join(sys.argv[1:])
-    else:
-        # Fallback por defecto para ejecución sin argumentos
-        entrada_str = "c d d $"
-
-    entrada_tokens = entrada_str.split()
+    entrada_tokens = tokenize(lr1, entrada_str)
+    if entrada_tokens is None:
+        return
     print("\n=== Parseando entrada (LR1) ===")
     print(f"Entrada: {entrada_tokens}")
     _ = parser.parse(entrada_tokens)
 
+    if args.ll1:
+        parse_ll1(gramatica, entrada_tokens)
+
+
+def parse_ll1(gramatica: Grammar, entrada_tokens) -> None:
+    # Same tokens through the LL(1) predictive parser, for comparison
+    first = First(gramatica)
+    first.compute()
+    follow = Follow(gramatica, first)
+    follow.compute()
+    table = Table(gramatica, first, follow)
+    print("\n=== Tabla LL(1) ===")
+    table.print()
+    ll1 = Parser(table, table.getNonTerminalId(gramatica.initialState))
+    print("\n=== Parseando entrada (LL1) ===")
+    print(f"Entrada: {entrada_tokens}")
+    _ = ll1.parse(entrada_tokens)
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,106 @@
+from __future__ import annotations
+from typing import Dict, List, Sequence, Tuple
+import threading
+
+# Dual-imports to support running as script or module
+if __package__ is None or __package__ == "":
+    from lr1 import BuildStats
+else:
+    from .lr1 import BuildStats
+
+
+# Request latency buckets in seconds (upper bounds; +Inf is implied)
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# BuildStats counters exported as lr1_build_<name>_total
+_BUILD_COUNTERS = ('closure_calls', 'closure_cache_hits', 'items_created', 'empty_gotos',
+                   'states', 'transitions', 'conflicts')
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)  # per bucket, not cumulative
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str) -> List[str]:
+        out: List[str] = []
+        cumulative = 0
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            out.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+        out.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        out.append(f'{name}_sum{{{labels}}} {self.sum:.6f}')
+        out.append(f'{name}_count{{{labels}}} {self.count}')
+        return out
+
+
+class Metrics:
+    """Process-wide API metrics in the Prometheus text format.
+
+    Request latencies are histograms per endpoint; every grammar build
+    (cache misses only) adds its BuildStats to the build counters.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self._lock = threading.Lock()
+        self.buckets = tuple(buckets)
+        self.requests: Dict[str, Histogram] = {}
+        self.builds: Dict[str, int] = {}  # by mode
+        self.phase_seconds: Dict[str, float] = {'first': 0.0, 'collection': 0.0, 'tables': 0.0}
+        self.counters: Dict[str, int] = {name: 0 for name in _BUILD_COUNTERS}
+        self.peak_item_set = 0
+
+    def observe_request(self, endpoint: str, seconds: float) -> None:
+        with self._lock:
+            hist = self.requests.get(endpoint)
+            if hist is None:
+                hist = self.requests[endpoint] = Histogram(self.buckets)
+            hist.observe(seconds)
+
+    def observe_build(self, mode: str, stats: BuildStats) -> None:
+        with self._lock:
+            self.builds[mode] = self.builds.get(mode, 0) + 1
+            self.phase_seconds['first'] += stats.first_seconds
+            self.phase_seconds['collection'] += stats.collection_seconds
+            self.phase_seconds['tables'] += stats.tables_seconds
+            for name in _BUILD_COUNTERS:
+                self.counters[name] += getattr(stats, name)
+            self.peak_item_set = max(self.peak_item_set, stats.peak_item_set)
+
+    def render(self) -> str:
+        with self._lock:
+            out: List[str] = [
+                '# HELP lr1_request_duration_seconds Request latency by endpoint.',
+                '# TYPE lr1_request_duration_seconds histogram',
+            ]
+            for endpoint in sorted(self.requests):
+                out += self.requests[endpoint].lines('lr1_request_duration_seconds', f'endpoint="{endpoint}"')
+            out += [
+                '# HELP lr1_builds_total Grammars built (cache misses) by mode.',
+                '# TYPE lr1_builds_total counter',
+            ]
+            out += [f'lr1_builds_total{{mode="{mode}"}} {n}' for mode, n in sorted(self.builds.items())]
+            out += [
+                '# HELP lr1_build_phase_seconds_total Time spent in each build phase.',
+                '# TYPE lr1_build_phase_seconds_total counter',
+            ]
+            out += [f'lr1_build_phase_seconds_total{{phase="{phase}"}} {s:.6f}' for phase, s in self.phase_seconds.items()]
+            for name in _BUILD_COUNTERS:
+                metric = f'lr1_build_{name}_total'
+                out += [f'# TYPE {metric} counter', f'{metric} {self.counters[name]}']
+            out += [
+                '# HELP lr1_build_peak_item_set Largest closure built so far, in LR(1) items.',
+                '# TYPE lr1_build_peak_item_set gauge',
+                f'lr1_build_peak_item_set {self.peak_item_set}',
+            ]
+        return '\n'.join(out) + '\n'
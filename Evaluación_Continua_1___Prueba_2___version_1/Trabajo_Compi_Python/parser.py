@@ -1,9 +1,53 @@
 from __future__ import annotations
-from typing import List
+from array import array
+from typing import Dict, List, Tuple
+import weakref
 if __package__ is None or __package__ == "":
     from table import Table, Symbol, TERMINAL, NONTERMINAL
+    from lr_parser import ParseResult
 else:
     from .table import Table, Symbol, TERMINAL, NONTERMINAL
+    from .lr_parser import ParseResult
+
+
+class LLTables:
+    """The LL(1) table as flat integer arrays for the silent driver.
+
+    Symbols are single ints: terminal t is t, nonterminal A is n_terminals + A.
+    cell[A * n_terminals + t] is the production id for (A, t), -1 if empty.
+    The right-hand side of production p is rhs[rhs_start[p]:rhs_start[p + 1]],
+    stored reversed so it can be pushed onto the stack as is. Built once
+    per Table and shared by every parser that uses it.
+    """
+
+    _cache: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    def __init__(self, table: Table) -> None:
+        self.n_terminals = n_t = len(table.tsVec)
+        self.n_nonterminals = len(table.ntsVec)
+        self.cell = array('i', [-1]) * (self.n_nonterminals * n_t)
+        self.rhs = array('i')
+        self.rhs_start = array('i', [0])
+        self.prod_lhs = array('i')
+        # Every table cell holds its own Symbol list; equal ones share an id
+        ids: Dict[Tuple[int, Tuple[int, ...]], int] = {}
+        for (A, t), syms in table.parserTable.items():
+            encoded = tuple(s.value if s.type == TERMINAL else n_t + s.value for s in syms)
+            p = ids.get((A, encoded))
+            if p is None:
+                p = ids[(A, encoded)] = len(self.prod_lhs)
+                self.prod_lhs.append(A)
+                self.rhs.extend(reversed(encoded))
+                self.rhs_start.append(len(self.rhs))
+            self.cell[A * n_t + t] = p
+
+    @classmethod
+    def of(cls, table: Table) -> "LLTables":
+        tables = cls._cache.get(table)
+        if tables is None:
+            tables = cls(table)
+            cls._cache[table] = tables
+        return tables
 
 
 class Parser:
@@ -11,6 +55,55 @@ class Parser:
         self.table = table
         self.startSymbol = startSymbol
 
+    def run(self, tokens: List[str]) -> ParseResult:
+        """Parse without printing; same result type as LRParser.run.
+
+        A missing trailing '$' is added, as in parse(). On error, error_pos
+        is the index of the offending token (len(tokens) for the implicit '$').
+        """
+        table = self.table
+        ll = LLTables.of(table)
+        n_t = ll.n_terminals
+        cell, rhs, rhs_start = ll.cell, ll.rhs, ll.rhs_start
+        termMap = table.termMap
+        dollarId = termMap.get('$', -1)
+
+        ids: List[int] = []
+        for i, tok in enumerate(tokens):
+            tid = termMap.get(tok, -1)
+            if tid < 0:
+                return ParseResult(False, i, tok, [])
+            ids.append(tid)
+        if not ids or ids[-1] != dollarId:
+            ids.append(dollarId)
+
+        stack: List[int] = [dollarId, n_t + self.startSymbol]
+        pop, push = stack.pop, stack.extend
+        ip = 0
+        la = ids[0]
+        while stack:
+            X = pop()
+            if X < n_t:
+                if X != la:
+                    return self._error(ids, ip, [X])
+                ip += 1
+                if ip < len(ids):
+                    la = ids[ip]
+                continue
+            p = cell[(X - n_t) * n_t + la]
+            if p < 0:
+                row = (X - n_t) * n_t
+                return self._error(ids, ip, [t for t in range(n_t) if cell[row + t] >= 0])
+            push(rhs[rhs_start[p]:rhs_start[p + 1]])
+        if ip == len(ids):
+            return ParseResult(True)
+        return self._error(ids, ip, [])
+
+    def _error(self, ids: List[int], ip: int, expected: List[int]) -> ParseResult:
+        names = self.table.tsVec
+        tok = names[ids[ip]] if ip < len(ids) else '$'
+        return ParseResult(False, ip, tok, sorted(names[t] for t in expected))
+
     def parse(self, tokens: List[str]) -> bool:
         # Convert tokens to IDs
         input_ids: List[int] = []
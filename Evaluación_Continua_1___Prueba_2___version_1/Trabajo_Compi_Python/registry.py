@@ -0,0 +1,149 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+import os
+import re
+import tempfile
+import threading
+import time
+
+# Dual-imports to support running as script or module
+if __package__ is None or __package__ == "":
+    from tablefile import CompiledTables, load_tables
+else:
+    from .tablefile import CompiledTables, load_tables
+
+
+# Ids are grammar_key digests; anything else never reaches the filesystem
+_ID = re.compile(r'^[0-9a-f]{64}$')
+# Last use is recorded in the file mtime, at most this often
+TOUCH_INTERVAL = 60.0
+
+
+def valid_id(grammar_id: str) -> bool:
+    return bool(_ID.match(grammar_id))
+
+
+class GrammarRegistry:
+    """Compiled grammars stored on disk, addressed by their grammar_key.
+
+    Each grammar is kept per mode as `<mode>-<id>.lr1t`, a table file
+    (tablefile format) that is memory-mapped on first use, so it survives
+    restarts and is never rebuilt while it stays here. Files unused for
+    `max_age` seconds are evicted, and the least recently used go first
+    when the directory grows beyond `max_bytes`.
+    """
+
+    def __init__(self, directory: str, max_age: Optional[float] = None,
+                 max_bytes: Optional[int] = None) -> None:
+        self.directory = directory
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._open: Dict[str, CompiledTables] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        self.evict()
+
+    def path(self, grammar_id: str, mode: str) -> str:
+        return os.path.join(self.directory, f"{mode}-{grammar_id}.lr1t")
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        grammar_id, mode = key
+        return valid_id(grammar_id) and os.path.exists(self.path(grammar_id, mode))
+
+    def get(self, grammar_id: str, mode: str = 'lr1') -> Optional[CompiledTables]:
+        """Tables of a stored grammar, or None if it is not (or no longer) here."""
+        if not valid_id(grammar_id):
+            return None
+        path = self.path(grammar_id, mode)
+        with self._lock:
+            tables = self._open.get(path)
+            if tables is None:
+                try:
+                    tables = load_tables(path)
+                except (OSError, ValueError):
+                    self.misses += 1
+                    return None
+                self._open[path] = tables
+            self.hits += 1
+        self._touch(path)
+        return tables
+
+    def put(self, grammar_id: str, lr1) -> str:
+        """Store the tables of a built LR1Builder under `grammar_id`; returns the path."""
+        if not valid_id(grammar_id):
+            raise ValueError(f"Identificador de gramática inválido: {grammar_id}")
+        path = self.path(grammar_id, lr1.mode)
+        if not os.path.exists(path):
+            # Write under a private name, then rename: readers never see a partial file
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            os.close(fd)
+            try:
+                lr1.export_tables(tmp)
+                os.replace(tmp, path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            self.evict(keep=path)
+        else:
+            self._touch(path)
+        return path
+
+    def _touch(self, path: str) -> None:
+        try:
+            if time.time() - os.path.getmtime(path) > TOUCH_INTERVAL:
+                os.utime(path)
+        except OSError:
+            pass
+
+    def _files(self) -> List[Tuple[float, int, str]]:
+        # (last use, size, path) of every stored grammar
+        out: List[Tuple[float, int, str]] = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.lr1t'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            out.append((st.st_mtime, st.st_size, path))
+        return out
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Remove expired files, then the least recently used until under
+        max_bytes (never `keep`). Returns how many were removed."""
+        files = sorted(self._files())
+        now = time.time()
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for mtime, size, path in files:
+            expired = self.max_age is not None and now - mtime > self.max_age
+            too_big = self.max_bytes is not None and total > self.max_bytes
+            if path == keep or not (expired or too_big):
+                continue
+            with self._lock:
+                # Parsers still holding the tables keep their mapping
+                self._open.pop(path, None)
+            try:
+                os.remove(path)
+            except OSError:
+                continue  # e.g. still mapped on Windows; retried next time
+            total -= size
+            removed += 1
+        self.evictions += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        files = self._files()
+        return {
+            "grammars": len(files),
+            "bytes": sum(size for _, size, _ in files),
+            "max_bytes": self.max_bytes,
+            "max_age": self.max_age,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,255 @@
+from __future__ import annotations
+from typing import Dict, Iterator, List, Tuple
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+# Dual-imports to support running as script or module
+if __package__ is None or __package__ == "":
+    from lr1 import LR1Builder, Production
+    from cache import grammar_key
+else:
+    from .lr1 import LR1Builder, Production
+    from .cache import grammar_key
+
+
+# File layout (little-endian):
+#   header   MAGIC, version, cell typecode, n_states, n_terminals, n_nonterminals,
+#            offsets/lengths of the sections below
+#   meta     UTF-8 JSON: symbols, productions, rules, lexer rules, conflicts, grammar key, mode
+#   ACTION   n_states x n_terminals cells: 0 error, 1 accept, v >= 2 shift to v-2,
+#            v < 0 reduce production -v-1
+#   GOTO     n_states x n_nonterminals cells: -1 empty, otherwise target state
+# Table cells are int16 when every value fits, int32 otherwise.
+MAGIC = b'LR1T'
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('<4sHcxIIIQQQQQQ')
+_ALIGN = 8
+
+ACTION_ERROR = 0
+ACTION_ACCEPT = 1
+
+
+def _pad(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def write_tables(lr1: LR1Builder, path: str) -> None:
+    """Write the ACTION/GOTO tables of a built LR1Builder to `path`."""
+    if not lr1.ACTION:
+        if not lr1.states:
+            lr1.build_canonical_collection()
+        lr1.build_tables()
+
+    terminals = sorted(lr1.grammar.terminals)
+    nonterminals = sorted(lr1.grammar.nonTerminals)
+    t_index = {t: i for i, t in enumerate(terminals)}
+    nt_index = {A: i for i, A in enumerate(nonterminals)}
+    prod_index = {p: i for i, p in enumerate(lr1.productions)}
+    n_states = len(lr1.states)
+    n_t, n_nt = len(terminals), len(nonterminals)
+
+    biggest = max(n_states + 2, len(lr1.productions) + 1)
+    typecode = b'h' if biggest < 2 ** 15 else b'i'
+
+    action = array(typecode.decode(), [ACTION_ERROR]) * (n_states * n_t)
+    for (s, a), act in lr1.ACTION.items():
+        if act[0] == 'shift':
+            v = act[1] + 2
+        elif act[0] == 'reduce':
+            v = -prod_index[act[1]] - 1
+        elif act[0] == 'accept':
+            v = ACTION_ACCEPT
+        else:
+            continue
+        action[s * n_t + t_index[a]] = v
+    goto = array(typecode.decode(), [-1]) * (n_states * n_nt)
+    for (s, A), j in lr1.GOTO.items():
+        goto[s * n_nt + nt_index[A]] = j
+    if sys.byteorder != 'little':
+        action.byteswap()
+        goto.byteswap()
+
+    meta = json.dumps({
+        "initial": lr1.start_symbol,
+        "aug_start": lr1.aug_start,
+        "terminals": terminals,
+        "nonterminals": nonterminals,
+        "productions": [[p.lhs, list(p.rhs)] for p in lr1.productions],
+        "rules": list(lr1.grammar.rules),
+        "lex": list(lr1.grammar.lexRules),
+        "conflicts": list(lr1.conflicts),
+        "key": grammar_key('\n'.join(lr1.grammar.lexRules + lr1.grammar.rules)),
+        "mode": lr1.mode,
+    }, ensure_ascii=False).encode('utf-8')
+
+    meta_off = _pad(_HEADER.size)
+    action_bytes = action.tobytes()
+    action_off = _pad(meta_off + len(meta))
+    goto_bytes = goto.tobytes()
+    goto_off = _pad(action_off + len(action_bytes))
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, typecode, n_states, n_t, n_nt,
+                          meta_off, len(meta), action_off, len(action_bytes),
+                          goto_off, len(goto_bytes))
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.write(b'\0' * (meta_off - len(header)))
+        f.write(meta)
+        f.write(b'\0' * (action_off - meta_off - len(meta)))
+        f.write(action_bytes)
+        f.write(b'\0' * (goto_off - action_off - len(action_bytes)))
+        f.write(goto_bytes)
+
+
+class _ActionView:
+    # Read-only mapping (state, terminal) -> action tuple, backed by the mmap.
+    def __init__(self, tables: "CompiledTables") -> None:
+        self._t = tables
+
+    def get(self, key: Tuple[int, str], default=None):
+        s, a = key
+        t = self._t
+        col = t.terminal_ids.get(a)
+        if col is None or not (0 <= s < t.n_states):
+            return default
+        v = t._action[s * t.n_terminals + col]
+        if v == ACTION_ERROR:
+            return default
+        if v == ACTION_ACCEPT:
+            return ('accept', None)
+        if v > 0:
+            return ('shift', v - 2)
+        return ('reduce', t.productions[-v - 1])
+
+    def __getitem__(self, key: Tuple[int, str]):
+        act = self.get(key)
+        if act is None:
+            raise KeyError(key)
+        return act
+
+    def __contains__(self, key) -> bool:
+        return self.get(key) is not None
+
+    def items(self) -> Iterator[Tuple[Tuple[int, str], Tuple[str, object]]]:
+        t = self._t
+        for s in range(t.n_states):
+            for a in t.terminals:
+                act = self.get((s, a))
+                if act is not None:
+                    yield (s, a), act
+
+    def __len__(self) -> int:
+        return sum(1 for v in self._t._action if v != ACTION_ERROR)
+
+
+class _GotoView:
+    # Read-only mapping (state, nonterminal) -> state, backed by the mmap.
+    def __init__(self, tables: "CompiledTables") -> None:
+        self._t = tables
+
+    def get(self, key: Tuple[int, str], default=None):
+        s, A = key
+        t = self._t
+        col = t.nonterminal_ids.get(A)
+        if col is None or not (0 <= s < t.n_states):
+            return default
+        j = t._goto[s * t.n_nonterminals + col]
+        return default if j < 0 else j
+
+    def __getitem__(self, key: Tuple[int, str]) -> int:
+        j = self.get(key)
+        if j is None:
+            raise KeyError(key)
+        return j
+
+    def __contains__(self, key) -> bool:
+        return self.get(key) is not None
+
+    def items(self) -> Iterator[Tuple[Tuple[int, str], int]]:
+        t = self._t
+        for s in range(t.n_states):
+            for A in t.nonterminals:
+                j = self.get((s, A))
+                if j is not None:
+                    yield (s, A), j
+
+    def __len__(self) -> int:
+        return sum(1 for v in self._t._goto if v >= 0)
+
+
+class CompiledTables:
+    """Parse tables loaded from a file written by `write_tables`.
+
+    ACTION and GOTO are served straight from the memory-mapped file, so every
+    process that loads the same file shares its pages. Exposes the same
+    `ACTION`, `GOTO`, `productions` and `conflicts` attributes LRParser uses
+    from LR1Builder.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, typecode, n_states, n_t, n_nt, meta_off, meta_len,
+         action_off, action_len, goto_off, goto_len) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path}: no es un archivo de tablas LR")
+        if version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path}: versión de formato {version} no soportada (se espera {FORMAT_VERSION})")
+
+        meta = json.loads(bytes(self._mm[meta_off:meta_off + meta_len]).decode('utf-8'))
+        self.n_states: int = n_states
+        self.n_terminals: int = n_t
+        self.n_nonterminals: int = n_nt
+        self.start_symbol: str = meta["initial"]
+        self.aug_start: str = meta["aug_start"]
+        self.terminals: List[str] = meta["terminals"]
+        self.nonterminals: List[str] = meta["nonterminals"]
+        self.rules: List[str] = meta["rules"]
+        self.lex_rules: List[str] = meta.get("lex", [])
+        self.conflicts: List[str] = meta["conflicts"]
+        self.key: str = meta["key"]
+        self.mode: str = meta.get("mode", "lr1")
+        self.productions: List[Production] = [Production(lhs, tuple(rhs)) for lhs, rhs in meta["productions"]]
+        self.terminal_ids: Dict[str, int] = {t: i for i, t in enumerate(self.terminals)}
+        self.nonterminal_ids: Dict[str, int] = {A: i for i, A in enumerate(self.nonterminals)}
+
+        view = memoryview(self._mm)
+        self._view = view
+        tc = typecode.decode()
+        if sys.byteorder == 'little':
+            self._action = view[action_off:action_off + action_len].cast(tc)
+            self._goto = view[goto_off:goto_off + goto_len].cast(tc)
+        else:
+            # Big-endian hosts pay for a private, byte-swapped copy
+            self._action = array(tc, view[action_off:action_off + action_len])
+            self._goto = array(tc, view[goto_off:goto_off + goto_len])
+            self._action.byteswap()
+            self._goto.byteswap()
+        self.ACTION = _ActionView(self)
+        self.GOTO = _GotoView(self)
+
+    def close(self) -> None:
+        for attr in ('_action', '_goto', '_view'):
+            buf = getattr(self, attr, None)
+            if isinstance(buf, memoryview):
+                buf.release()
+        self._mm.close()
+
+    def print_tables(self) -> None:
+        print(f"=== Tablas precompiladas ({self.path}) ===")
+        print(f"Estados: {self.n_states}, terminales: {self.n_terminals}, no terminales: {self.n_nonterminals}")
+        if self.conflicts:
+            print("=== Conflicts ===")
+            for c in self.conflicts:
+                print(c)
+        print()
+
+
+def load_tables(path: str) -> CompiledTables:
+    return CompiledTables(path)
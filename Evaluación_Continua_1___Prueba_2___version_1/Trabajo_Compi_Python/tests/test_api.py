@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient
+
+from Trabajo_Compi_Python.api import app
+
+GRAMMAR = "S -> C C\nC -> c C\nC -> d"
+
+client = TestClient(app)
+
+
+def test_parse_compact_trace_has_steps():
+    r = client.post("/parse", json={"grammar": GRAMMAR, "input": "c d d"})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["accepted"]
+    trace = body["trace"]
+    assert trace["total"] > 0
+    assert len(trace["steps"]) == trace["total"]
+    assert trace["steps"][-1]["action"]["type"] == "accept"
+
+
+def test_parse_verbose_trace_has_steps():
+    r = client.post("/parse", json={"grammar": GRAMMAR, "input": "c d d", "trace": "verbose"})
+    assert r.status_code == 200
+    steps = r.json()["trace"]
+    assert steps
+    assert steps[0]["stackStates"] == [0]
+    assert steps[-1]["action"]["type"] == "accept"
+
+
+def test_parse_without_trace():
+    r = client.post("/parse", json={"grammar": GRAMMAR, "input": "c d d", "trace": "none"})
+    assert r.status_code == 200
+    assert r.json()["trace"] is None
+
+
+def test_build_stats_do_not_change_across_builds():
+    stats = [client.post("/build", json={"grammar": GRAMMAR}).json()["stats"] for _ in range(3)]
+    assert stats[0]["closure_calls"] > 0
+    assert stats[0] == stats[1] == stats[2]
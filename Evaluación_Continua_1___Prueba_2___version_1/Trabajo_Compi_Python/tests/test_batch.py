@@ -0,0 +1,32 @@
+from Trabajo_Compi_Python.batch import BatchRunner
+from Trabajo_Compi_Python.cache import build_grammar
+
+RULES = "S -> S num | num"
+# Same productions, different lexers: "12ab" is one num only for G2
+G1 = "%token num /[0-9]+/\n%ignore /\\s+/\n" + RULES
+G2 = "%token num /[0-9a-z]+/\n%ignore /\\s+/\n" + RULES
+INPUTS = ["12ab 3", "4 5cd", "abc", "7"]
+
+
+def run(runner, grammar):
+    _, lr1 = build_grammar(grammar, "lr1")
+    return [r["accepted"] for r in runner.run(lr1, INPUTS)]
+
+
+def test_grammars_differing_in_tokens_get_their_own_tables(tmp_path):
+    runner = BatchRunner(workers=2, chunk_size=1, inline_below=0, tables_dir=str(tmp_path))
+    try:
+        assert run(runner, G1) == [False, False, False, True]
+        assert run(runner, G2) == [True, True, True, True]
+    finally:
+        runner.shutdown()
+
+
+def test_pool_matches_inline(tmp_path):
+    pool = BatchRunner(workers=2, chunk_size=1, inline_below=0, tables_dir=str(tmp_path))
+    inline = BatchRunner(workers=1)
+    try:
+        for grammar in (G2, G1):
+            assert run(pool, grammar) == run(inline, grammar)
+    finally:
+        pool.shutdown()
@@ -0,0 +1,46 @@
+import pytest
+
+from Trabajo_Compi_Python.grammar import Grammar
+from Trabajo_Compi_Python.lr1 import LR1Builder
+
+# LR(1) but not LALR(1): the two "c" states merge
+MERGE = "S -> a A d | b B d | a B e | b A e\nA -> c\nB -> c"
+# Ambiguous: the conflict is already in the canonical LR(1) tables
+INHERENT = "S -> A | B\nA -> x\nB -> x"
+
+
+def lalr(text, monkeypatch):
+    # Labelling conflicts must not build the canonical collection
+    def canonical(*args, **kwargs):
+        raise AssertionError("canonical LR(1) collection built")
+
+    monkeypatch.setattr(LR1Builder, "_number_states", canonical)
+    g = Grammar()
+    g.load_from_string(text)
+    lr1 = LR1Builder(g, mode="lalr")
+    lr1.build_tables()
+    return lr1
+
+
+def test_merge_conflicts_are_labelled(monkeypatch):
+    conflicts = lalr(MERGE, monkeypatch).conflicts
+    assert len(conflicts) == 2
+    assert all(c.startswith("[LALR merge conflict]") for c in conflicts)
+
+
+def test_inherent_conflicts_are_not_labelled(monkeypatch):
+    conflicts = lalr(INHERENT, monkeypatch).conflicts
+    assert conflicts and all(c.startswith("[Conflict]") for c in conflicts)
+
+
+@pytest.mark.parametrize("text", [MERGE + "\nS -> A f | B f", INHERENT + "\nS -> y A z | y B w"])
+def test_mixed_conflicts(monkeypatch, text):
+    lalr_conflicts = lalr(text, monkeypatch).conflicts
+    monkeypatch.undo()
+    g = Grammar()
+    g.load_from_string(text)
+    canonical = LR1Builder(g, mode="lr1")
+    canonical.build_tables()
+    # Unlabelled LALR conflicts are exactly the canonical ones
+    inherent = [c for c in lalr_conflicts if c.startswith("[Conflict]")]
+    assert len(inherent) == len(canonical.conflicts)
@@ -0,0 +1,42 @@
+from Trabajo_Compi_Python.grammar import Grammar
+from Trabajo_Compi_Python.lr1 import LR1Builder
+
+
+def test_self_loop_on_newest_state_terminates():
+    # One state here has a goto to itself while it is the newest state,
+    # which used to put it back on the worklist forever
+    g = Grammar()
+    g.load_from_string("S -> a A A | a a a | S a\nA -> '' | a A A | ''")
+    lr1 = LR1Builder(g)
+    lr1.build_canonical_collection()
+    assert any(sid == j for (sid, _), j in lr1.transitions.items())
+    assert len(lr1.states) == len(set(st.kernel for st in lr1.states))
+
+
+def test_build_stats_are_frozen_after_build_tables():
+    g = Grammar()
+    g.load_from_string("E -> E + T | T\nT -> T * F | F\nF -> ( E ) | id")
+    lr1 = LR1Builder(g, closure_cache_size=2)
+    lr1.build_tables()
+    frozen = lr1.build_stats.to_json()
+    assert frozen == lr1.stats.to_json()
+    for st in lr1.states:
+        st.items, st.kernel_items, len(st)
+    assert lr1.build_stats.to_json() == frozen
+
+
+def test_closure_views_from_many_threads():
+    from concurrent.futures import ThreadPoolExecutor
+    g = Grammar()
+    g.load_from_string("E -> E + T | T\nT -> T * F | F\nF -> ( E ) | id")
+    lr1 = LR1Builder(g, closure_cache_size=2)
+    lr1.build_canonical_collection()
+    lr1.build_tables()
+    expected = [st.items for st in lr1.states]
+
+    def expand(_):
+        return [st.items for st in lr1.states]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for got in pool.map(expand, range(200)):
+            assert got == expected
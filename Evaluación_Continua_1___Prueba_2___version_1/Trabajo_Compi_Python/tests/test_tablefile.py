@@ -0,0 +1,42 @@
+from Trabajo_Compi_Python.cache import build_grammar
+from Trabajo_Compi_Python.lr_parser import LRParser
+from Trabajo_Compi_Python.tablefile import _ActionView, load_tables
+
+GRAMMAR = "E -> E + T | T\nT -> T * F | F\nF -> ( E ) | id"
+INPUTS = ["id + id * id", "( id + id ) * id", "id + * id", "( id", "id id", ""]
+
+
+def compiled(tmp_path):
+    _, lr1 = build_grammar(GRAMMAR, "lr1")
+    path = str(tmp_path / "expr.lr1t")
+    lr1.export_tables(path)
+    return lr1, load_tables(path)
+
+
+def test_compiled_tables_parse_like_the_builder(tmp_path):
+    lr1, tables = compiled(tmp_path)
+    try:
+        for text in INPUTS:
+            a = LRParser(lr1).run(text.split(), build_tree=True)
+            b = LRParser(tables).run(text.split(), build_tree=True)
+            assert (a.accepted, a.error_pos, a.error_token, a.expected) == \
+                   (b.accepted, b.error_pos, b.error_token, b.expected)
+            if a.accepted:
+                assert a.flat.render_ascii() == b.flat.render_ascii()
+    finally:
+        tables.close()
+
+
+def test_compiled_tables_are_not_scanned_or_copied(tmp_path, monkeypatch):
+    _, tables = compiled(tmp_path)
+
+    def scan(self):
+        raise AssertionError("ACTION scanned")
+
+    monkeypatch.setattr(_ActionView, "__len__", scan)
+    try:
+        t = LRParser(tables).tables
+        assert not any(isinstance(row, dict) for row in t.action)
+        assert LRParser(tables).run("id * id".split()).accepted
+    finally:
+        tables.close()
@@ -0,0 +1,46 @@
+import random
+from typing import List
+
+from Trabajo_Compi_Python.cache import build_grammar
+from Trabajo_Compi_Python.lr_parser import LRParser, ParseNode, ParseTree, render_tree_ascii
+
+
+def baseline_ascii(node: ParseNode, prefix: str = "", is_last: bool = True) -> List[str]:
+    # The original recursive renderer; the output format must not change
+    lines: List[str] = []
+    if prefix == "":
+        lines.append(node.label)
+    else:
+        lines.append(prefix + ("└── " if is_last else "├── ") + node.label)
+    new_prefix = prefix + ("    " if is_last else "│   ")
+    for i, ch in enumerate(node.children):
+        lines.extend(baseline_ascii(ch, new_prefix, i == len(node.children) - 1))
+    return lines
+
+
+def test_render_ascii_literal():
+    _, lr1 = build_grammar("S -> C C\nC -> c C | d", "lr1")
+    result = LRParser(lr1).run("c d d".split(), build_tree=True)
+    assert result.flat.render_ascii() == "\n".join([
+        "S",
+        "    ├── C",
+        "    │   ├── c",
+        "    │   └── C",
+        "    │       └── d",
+        "    └── C",
+        "        └── d",
+    ])
+
+
+def random_tree(rng: random.Random, depth: int) -> ParseNode:
+    n = rng.randint(0, 4) if depth else 0
+    return ParseNode(f"n{rng.randint(0, 99)}", [random_tree(rng, depth - 1) for _ in range(n)])
+
+
+def test_render_ascii_matches_baseline():
+    rng = random.Random(0)
+    for _ in range(50):
+        node = random_tree(rng, rng.randint(0, 6))
+        expected = "\n".join(baseline_ascii(node))
+        assert ParseTree.from_node(node).render_ascii() == expected
+        assert render_tree_ascii(node) == expected
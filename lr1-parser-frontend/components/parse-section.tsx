@@ -30,7 +30,7 @@ const ParseSection = ({ grammar, buildData, parseResult, onParseComplete }: Pars
         headers: {
           "Content-Type": "application/json",
         },
-        body: JSON.stringify({ grammar, input }),
+        body: JSON.stringify({ grammar, input, trace: "verbose" }),
         mode: "cors",
       })
 
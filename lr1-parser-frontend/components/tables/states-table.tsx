@@ -10,6 +10,13 @@ interface StatesTableProps {
   states: any[]
 }
 
+// Same text as the API's closure_table: [A -> α · β, a]
+function formatItem(item: any) {
+  const parts = [...item.rhs]
+  parts.splice(item.dot, 0, "·")
+  return `[${item.lhs} -> ${parts.join(" ")}, ${item.lookahead}]`
+}
+
 export default function StatesTable({ states }: StatesTableProps) {
   const [viewMode, setViewMode] = useState<"table" | "graph">("table")
 
@@ -49,7 +56,7 @@ export default function StatesTable({ states }: StatesTableProps) {
                   <div className="space-y-2 mb-4">
                     {state.items.map((item: any, idx: number) => (
                       <div key={idx} className="text-sm font-mono text-foreground/80">
-                        {item.text}
+                        {formatItem(item)}
                       </div>
                     ))}
                   </div>